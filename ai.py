@@ -0,0 +1,356 @@
+"""
+Built-in autoplayer: weighted-heuristic beam search over current, next and hold.
+
+AutoPlayer(seed) is a policy like those in selfplay.py: call it with a
+TetrisEngine and it returns the next action. It plans one piece at a time,
+searching a beam over the current piece and the first lookahead pieces of
+the game's queue (with hold swaps) and then plays the chosen placement's
+action path. No pygame.
+"""
+
+from collections import OrderedDict, deque, namedtuple
+from operator import itemgetter, sub
+
+from engine import (
+    ROTATION_CLASS, NONE, LEFT, RIGHT, SOFT_DROP, ROTATE, HOLD,
+    column_heights, reachable_placements,
+)
+
+# Higher is better. Lines are rewarded when cleared along the searched path.
+Weights = namedtuple("Weights", "height holes bumpiness lines")
+DEFAULT_WEIGHTS = Weights(height=-0.51, holes=-0.36, bumpiness=-0.18, lines=0.76)
+
+EVAL_CACHE_SIZE = 65536
+
+
+class Node:
+    """A searched board: rows (a tuple, so it doubles as the cache key) plus
+    heights/filled kept incrementally from the parent, and the game's rules."""
+
+    __slots__ = ("rows", "heights", "filled", "lines", "hold", "index", "root", "value", "rules")
+
+    def __init__(self, rows, heights, filled, lines, hold, index, root, rules):
+        self.rows = rows
+        self.heights = heights
+        self.filled = filled
+        self.lines = lines
+        self.hold = hold
+        self.index = index
+        self.root = root
+        self.value = 0.0
+        self.rules = rules
+
+    def place(self, shape_idx, rotation, x, y, hold, index, root=None):
+        """Child node with the piece locked at (x, y); None if it sticks out of the top."""
+        rules = self.rules
+        info = rules.shapes[shape_idx][rotation]
+        full_row = rules.full_row
+        left = x + info.min_x
+        rows = list(self.rows)
+        full = False
+        for dy, mask in info.row_masks:
+            ny = y + dy
+            if ny < 0:
+                return None
+            rows[ny] |= mask << left
+            if rows[ny] == full_row:
+                full = True
+        if full:
+            kept = [mask for mask in rows if mask != full_row]
+            cleared = rules.height - len(kept)
+            rows = [0] * cleared + kept
+            heights = column_heights(rows, rules.width)
+            filled = self.filled + len(info.cells) - cleared * rules.width
+        else:
+            cleared = 0
+            heights = self.heights[:]
+            height = rules.height
+            for cx, cy in info.cells:
+                h = height - y - cy
+                if h > heights[x + cx]:
+                    heights[x + cx] = h
+            filled = self.filled + len(info.cells)
+        return Node(tuple(rows), heights, filled, self.lines + cleared, hold, index,
+                    self.root if root is None else root, rules)
+
+
+class AutoPlayer:
+    """Beam-search autoplayer; a callable policy returning one action per call."""
+
+    def __init__(self, seed=None, beam_width=8, weights=DEFAULT_WEIGHTS, use_hold=True, lookahead=1):
+        self.beam_width = beam_width
+        self.weights = weights
+        self.use_hold = use_hold
+        self.lookahead = lookahead
+        self._cache = OrderedDict()
+        self._rules = None
+        self._actions = deque()
+        self._key = None
+        self._target = None
+        self._expect = None
+
+    # Evaluation
+
+    def _static(self, heights, filled):
+        w = self.weights
+        total = sum(heights)
+        bump = sum(map(abs, map(sub, heights, heights[1:])))
+        return w.height * total + w.holes * (total - filled) + w.bumpiness * bump
+
+    def evaluate(self, node):
+        """Heuristic value of a node; static board terms come from a transposition cache."""
+        static = self._cache.get(node.rows)
+        if static is None:
+            static = self._static(node.heights, node.filled)
+            self._cache[node.rows] = static
+            if len(self._cache) > EVAL_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return static + self.weights.lines * node.lines
+
+    def _drop_values(self, node, shape_idx):
+        """[(value, rotation, x, y)] for every distinct straight drop of shape_idx on node.
+
+        The children are scored without being built: only a line clear needs
+        the new rows. Otherwise the piece just raises the columns under it to
+        its top profile, so the height and bumpiness totals follow from the
+        node's prefix sums, the profile and the two neighbouring columns.
+        """
+        w = self.weights
+        rules = node.rules
+        full_row = rules.full_row
+        height = rules.height
+        heights = node.heights
+        rows = node.rows
+        last = len(heights) - 1
+        # height_sums[i] = sum(heights[:i]); bump_sums[i] = bumpiness of heights[:i + 1]
+        height_sums = [0]
+        bump_sums = [0]
+        for a, b in zip(heights, heights[1:]):
+            height_sums.append(height_sums[-1] + a)
+            bump_sums.append(bump_sums[-1] + abs(a - b))
+        height_sums.append(height_sums[-1] + heights[-1])
+        total = height_sums[-1]
+        bump = bump_sums[-1]
+        # Bit y set: row y is at most four cells short, so a piece may complete it.
+        near = 0
+        for y, mask in enumerate(rows):
+            if mask and bin(full_row ^ mask).count("1") <= 4:
+                near |= 1 << y
+        base = w.lines * node.lines
+        values = []
+        seen = set()
+        for rotation in range(4):
+            r = ROTATION_CLASS[shape_idx][rotation]
+            if r in seen:
+                continue
+            seen.add(r)
+            info = rules.shapes[shape_idx][r]
+            filled = node.filled + len(info.cells)
+            width = info.width
+            profile = info.top
+            first_top, last_top = profile[0], profile[-1]
+            covered = total - sum(profile)
+            inner = sum(map(abs, map(sub, profile, profile[1:])))
+            span = (1 << (info.max_y - info.min_y + 1)) - 1
+            for left in range(info.max_left + 1):
+                y = info.floor
+                col = left
+                for land in info.land:
+                    land -= heights[col]
+                    if land < y:
+                        y = land
+                    col += 1
+                if y + info.min_y < 0:
+                    continue
+                x = left - info.min_x
+                if near >> (y + info.min_y) & span and any(
+                        rows[y + dy] | (mask << left) == full_row for dy, mask in info.row_masks):
+                    value = self.evaluate(node.place(shape_idx, r, x, y, node.hold, node.index))
+                else:
+                    top = height - y
+                    right = left + width
+                    grown = covered + width * top - height_sums[right] + height_sums[left]
+                    bumps = bump + inner
+                    if left:
+                        bumps += abs(heights[left - 1] - top + first_top) - bump_sums[left] + bump_sums[left - 1]
+                    if right <= last:
+                        bumps += abs(top - last_top - heights[right]) - bump_sums[right] + bump_sums[right - 1]
+                    bumps -= bump_sums[right - 1] - bump_sums[left]
+                    value = w.height * grown + w.holes * (grown - filled) + w.bumpiness * bumps + base
+                values.append((value, r, x, y))
+        return values
+
+    # Search
+
+    def search(self, game):
+        """Return (use_hold, placement) for the current piece, or None if nothing fits."""
+        board = game.board
+        if board.rules is not self._rules:
+            # The same rows score differently on another board width.
+            self._cache.clear()
+            self._rules = board.rules
+        root = Node(tuple(board.rows), list(board.heights), board.filled, 0, game.hold_idx, 0, None,
+                    board.rules)
+        queue = game.preview(self.lookahead)
+        options = [(False, game.shape_idx, reachable_placements(
+            board, game.shape_idx, game.pos_x, game.pos_y, game.rotation), game.hold_idx, 0)]
+        if self.use_hold and game.can_hold:
+            if game.hold_idx is None:
+                options.append((True, game.next_idx, reachable_placements(board, game.next_idx),
+                                game.shape_idx, 1))
+            else:
+                options.append((True, game.hold_idx, reachable_placements(board, game.hold_idx),
+                                game.shape_idx, 0))
+
+        beam = []
+        for use_hold, shape_idx, placements, hold, index in options:
+            for p in placements:
+                child = root.place(shape_idx, p.rotation, p.x, p.y, hold, index, (use_hold, p))
+                if child is not None:
+                    beam.append(child)
+        if not beam:
+            return None
+        beam = self._prune(beam)
+
+        # Deeper levels use straight drops against the height map; only the
+        # move actually played needs the full reachability search. Drops are
+        # scored before any child is built, so only the beam's survivors (and
+        # line clears) cost a copy of the rows. The last piece in the queue
+        # is only scored.
+        fallback = beam[0].root
+        best_value = best_root = None
+        while beam:
+            candidates = []
+            for node in beam:
+                if node.index >= len(queue):
+                    if best_value is None or node.value > best_value:
+                        best_value, best_root = node.value, node.root
+                    continue
+                active = queue[node.index]
+                choices = [(active, node.hold, node.index + 1)]
+                if self.use_hold:
+                    if node.hold is not None:
+                        choices.append((node.hold, active, node.index + 1))
+                    elif node.index + 1 < len(queue):
+                        choices.append((queue[node.index + 1], active, node.index + 2))
+                for shape_idx, hold, index in choices:
+                    values = self._drop_values(node, shape_idx)
+                    if index >= len(queue):
+                        if values:
+                            value = max(values)[0]
+                            if best_value is None or value > best_value:
+                                best_value, best_root = value, node.root
+                        continue
+                    for value, r, x, y in values:
+                        candidates.append((value, node, shape_idx, r, x, y, hold, index))
+            beam = self._select(candidates)
+        return fallback if best_root is None else best_root
+
+    def _prune(self, nodes):
+        """Score nodes, merge transpositions (same board and hold), keep the best beam_width."""
+        best = {}
+        for node in nodes:
+            node.value = self.evaluate(node)
+            key = (node.rows, node.hold, node.index)
+            other = best.get(key)
+            if other is None or node.value > other.value:
+                best[key] = node
+        return sorted(best.values(), key=lambda node: node.value, reverse=True)[:self.beam_width]
+
+    def _select(self, candidates):
+        """Build the best beam_width distinct children from (value, node, move...) candidates.
+
+        Best first, so the first child with a given board and hold is the one
+        _prune() would have kept.
+        """
+        candidates.sort(key=itemgetter(0), reverse=True)
+        beam = []
+        seen = set()
+        for value, node, shape_idx, r, x, y, hold, index in candidates:
+            child = node.place(shape_idx, r, x, y, hold, index)
+            key = (child.rows, hold, index)
+            if key in seen:
+                continue
+            seen.add(key)
+            child.value = value
+            beam.append(child)
+            if len(beam) == self.beam_width:
+                break
+        return beam
+
+    # Policy
+
+    def __call__(self, game):
+        if game.game_over:
+            return NONE
+        key = (game.pieces_placed, game.shape_idx, game.hold_idx)
+        state = (game.pos_x, game.pos_y, game.rotation)
+        if key != self._key or not self._actions:
+            self._plan(game)
+        elif self._expect is not None and state != self._expect:
+            # Gravity or a failed move changed the state: keep the plan if it
+            # still lands on the target, otherwise re-path to the same cells.
+            if not self._replays(game):
+                self._repath(game)
+        if not self._actions:
+            return NONE
+        action = self._actions.popleft()
+        if action == HOLD:
+            self._expect = None
+            return action
+        x, y, r = game.pos_x, game.pos_y, game.rotation
+        if action == LEFT:
+            x -= 1
+        elif action == RIGHT:
+            x += 1
+        elif action == SOFT_DROP:
+            y += 1
+        elif action == ROTATE:
+            r = (r + 1) % 4
+        self._expect = (x, y, r)
+        return action
+
+    def _plan(self, game):
+        choice = self.search(game)
+        self._actions.clear()
+        if choice is None:
+            self._key = None
+            return
+        use_hold, placement = choice
+        self._target = placement.cells
+        if use_hold:
+            self._actions.append(HOLD)
+            shape = game.next_idx if game.hold_idx is None else game.hold_idx
+            self._key = (game.pieces_placed, shape, game.shape_idx)
+        else:
+            self._key = (game.pieces_placed, game.shape_idx, game.hold_idx)
+        self._actions.extend(placement.path)
+
+    def _replays(self, game):
+        """True if the remaining actions still lock the piece on the target cells."""
+        board, s = game.board, game.shape_idx
+        x, y, r = game.pos_x, game.pos_y, game.rotation
+        for action in self._actions:
+            nx, ny, nr = x, y, r
+            if action == LEFT:
+                nx -= 1
+            elif action == RIGHT:
+                nx += 1
+            elif action == SOFT_DROP:
+                ny += 1
+            elif action == ROTATE:
+                nr = (r + 1) % 4
+            else:
+                ny = board.drop_y(s, r, x, y)
+            if not board.fits(s, nr, nx, ny):
+                return False
+            x, y, r = nx, ny, nr
+        cells = tuple(sorted((x + cx, y + cy) for cx, cy in board.shapes[s][r].cells))
+        return cells == self._target
+
+    def _repath(self, game):
+        for p in game.placements():
+            if p.cells == self._target:
+                self._actions = deque(p.path)
+                return
+        self._plan(game)
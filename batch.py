@@ -0,0 +1,271 @@
+"""
+Batch Tetris: N games stepped together with NumPy array operations.
+
+BatchEngine follows exactly the rules of engine.TetrisEngine: for the same
+seeds, rule set and per-game (action, dt) sequence it produces the same
+boards, pieces, scores, lines and levels. Boards up to MAX_WIDTH columns;
+versus garbage is not modelled. Requires NumPy.
+"""
+
+import numpy as np
+
+from engine import (
+    SHAPES, SHAPE_TABLE, DEFAULT_RULES,
+    LEFT, RIGHT, SOFT_DROP, ROTATE, HARD_DROP, HOLD,
+)
+from pieces import DEFAULT_GENERATOR, PieceQueue
+
+# Rows carry WALL columns of set bits on each side, so a shifted piece mask
+# that pokes past either edge collides like a locked cell. PAD empty rows
+# above and PAD solid rows below the well do the same for the floor.
+# Rows are int32 while they fit (up to 23 columns), int64 up to MAX_WIDTH.
+WALL = 4
+PAD = 4
+MAX_WIDTH = 63 - 2 * WALL
+
+# MASKS[shape, rotation, dy]: row masks relative to the matrix top, shifted to min_x = bit 0
+# (the same on every board; spawn columns are per rule set)
+MASKS = np.zeros((len(SHAPES), 4, 4), dtype=np.int32)
+MIN_X = np.zeros((len(SHAPES), 4), dtype=np.int32)
+for _s, _rotations in enumerate(SHAPE_TABLE):
+    for _r, _info in enumerate(_rotations):
+        MIN_X[_s, _r] = _info.min_x
+        for _dy, _mask in _info.row_masks:
+            MASKS[_s, _r, _dy] = _mask
+
+_DY = np.arange(4)
+
+
+class BatchEngine:
+    """N independent games in arrays; step() takes one action per game.
+
+    Board rows are stored as (N, PAD + height + PAD) int32 or int64 masks
+    with wall bits; rows() returns them in engine.Board layout. hold_idx is
+    -1 when nothing is held.
+    """
+
+    def __init__(self, seeds, queue_size=256, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+        width = rules.width
+        if width > MAX_WIDTH:
+            raise ValueError("BatchEngine boards are at most %d wide, not %d" % (MAX_WIDTH, width))
+        self.seeds = list(seeds)
+        self.n = len(self.seeds)
+        self.queue_size = queue_size
+        self.generator = generator
+        self.rules = rules
+        bits = width + 2 * WALL
+        self.row_dtype = np.int32 if bits < 32 else np.int64
+        self.empty_row = ((1 << bits) - 1) & ~(rules.full_row << WALL)
+        self.solid_row = (1 << bits) - 1
+        self.spawn_x = np.array([rotations[0].spawn_x for rotations in rules.shapes], dtype=np.int64)
+        self.score_per_line = np.array(rules.score_per_line, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        n = self.n
+        self.streams = [PieceQueue(seed, self.generator) for seed in self.seeds]
+        self.drawn = [0] * n
+        # Pieces are copied ahead per game from the same PieceQueue sequence TetrisEngine reads.
+        self.queue = np.zeros((n, self.queue_size), dtype=np.int8)
+        self.queue_pos = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            self._fill(i, self.queue_size)
+        height = self.rules.height
+        self.board = np.full((n, PAD + height + PAD), self.empty_row, dtype=self.row_dtype)
+        self.board[:, PAD + height:] = self.solid_row
+        all_games = np.arange(n)
+        self.shape_idx = self._draw(all_games)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.next_idx = self._draw(all_games)
+        self.hold_idx = np.full(n, -1, dtype=np.int64)
+        self.can_hold = np.ones(n, dtype=bool)
+        self.pos_x = self.spawn_x[self.shape_idx]
+        self.pos_y = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lines_cleared_total = np.zeros(n, dtype=np.int64)
+        self.pieces_placed = np.zeros(n, dtype=np.int64)
+        self.fall_time = np.zeros(n, dtype=np.float64)
+        self.fall_speed = np.full(n, self.rules.initial_fall_speed, dtype=np.float64)
+        self.lock_timer = np.zeros(n, dtype=np.float64)
+        self.elapsed = np.zeros(n, dtype=np.float64)
+        self.game_over = np.zeros(n, dtype=bool)
+
+    # Piece stream
+
+    def _fill(self, i, keep_from):
+        rest = self.queue[i, keep_from:].copy()
+        count = self.queue_size - len(rest)
+        fresh = self.streams[i].peek(self.drawn[i], count)
+        self.drawn[i] += count
+        self.queue[i, :len(rest)] = rest
+        self.queue[i, len(rest):] = fresh
+        self.queue_pos[i] = 0
+
+    def _draw(self, games):
+        pieces = self.queue[games, self.queue_pos[games]].astype(np.int64)
+        self.queue_pos[games] += 1
+        return pieces
+
+    def _refill(self, needed=2):
+        for i in np.nonzero(self.queue_pos > self.queue_size - needed)[0]:
+            self._fill(i, self.queue_pos[i])
+
+    # Board queries
+
+    def _fits(self, games, shape, rotation, pos_x, pos_y):
+        """Vector of fits() results for the given games and piece placements."""
+        shift = (pos_x + MIN_X[shape, rotation] + WALL)[:, None]
+        ys = (pos_y + PAD)[:, None] + _DY
+        rows = self.board[games[:, None], ys]
+        return ((rows & (MASKS[shape, rotation] << shift)) == 0).all(axis=1)
+
+    def fits(self, games, pos_x, pos_y, rotation=None):
+        if rotation is None:
+            rotation = self.rotation[games]
+        return self._fits(games, self.shape_idx[games], rotation, pos_x, pos_y)
+
+    def ghost_y(self, games):
+        y = self.pos_y[games].copy()
+        active = np.ones(len(games), dtype=bool)
+        while active.any():
+            sub = np.nonzero(active)[0]
+            can = self.fits(games[sub], self.pos_x[games[sub]], y[sub] + 1)
+            y[sub[can]] += 1
+            active[sub[~can]] = False
+        return y
+
+    def rows(self, i):
+        """Board rows of game i as in engine.Board.rows (bit x = column x, top first)."""
+        full_row = self.rules.full_row
+        return tuple([(int(r) >> WALL) & full_row for r in self.board[i, PAD:PAD + self.rules.height]])
+
+    # Stepping
+
+    def step(self, actions, dt=0.0):
+        """Apply one action per game, then advance gravity and lock delay by dt.
+
+        dt may be a scalar or a per-game array. Returns lines cleared per game.
+        """
+        actions = np.asarray(actions)
+        dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), (self.n,))
+        self._refill()
+        self._lines = np.zeros(self.n, dtype=np.int64)
+        live = ~self.game_over
+        self.elapsed[live] += dt[live]
+
+        drop = np.nonzero(live & (actions == HARD_DROP))[0]
+        if len(drop):
+            gy = self.ghost_y(drop)
+            self.score[drop] += self.rules.hard_drop_points * (gy - self.pos_y[drop])
+            self.pos_y[drop] = gy
+            self.fall_time[drop] = 0
+            self._lock(drop)
+
+        for action, dx in ((LEFT, -1), (RIGHT, 1)):
+            g = np.nonzero(live & (actions == action))[0]
+            if len(g):
+                nx = self.pos_x[g] + dx
+                ok = g[self.fits(g, nx, self.pos_y[g])]
+                self.pos_x[ok] += dx
+                self.lock_timer[ok] = 0
+        g = np.nonzero(live & (actions == SOFT_DROP))[0]
+        if len(g):
+            ok = g[self.fits(g, self.pos_x[g], self.pos_y[g] + 1)]
+            self.pos_y[ok] += 1
+            self.score[ok] += self.rules.soft_drop_points
+            self.lock_timer[ok] = 0
+        g = np.nonzero(live & (actions == ROTATE))[0]
+        if len(g):
+            new_rot = (self.rotation[g] + 1) % 4
+            ok = self.fits(g, self.pos_x[g], self.pos_y[g], new_rot)
+            self.rotation[g[ok]] = new_rot[ok]
+            self.lock_timer[g[ok]] = 0
+        g = np.nonzero(live & (actions == HOLD) & self.can_hold)[0]
+        if len(g):
+            self._hold(g)
+
+        g = np.nonzero(live & (actions != HARD_DROP))[0]
+        if len(g):
+            self._advance(g, dt[g])
+        return self._lines
+
+    def _hold(self, g):
+        held = self.hold_idx[g]
+        self.hold_idx[g] = self.shape_idx[g]
+        empty = g[held < 0]
+        if len(empty):
+            self.shape_idx[empty] = self.next_idx[empty]
+            self.next_idx[empty] = self._draw(empty)
+        swap = held >= 0
+        self.shape_idx[g[swap]] = held[swap]
+        self.rotation[g] = 0
+        self.pos_x[g] = self.spawn_x[self.shape_idx[g]]
+        self.pos_y[g] = 0
+        self.can_hold[g] = False
+
+    def _advance(self, g, dt):
+        # Gravity
+        self.fall_time[g] += dt
+        due = g[self.fall_time[g] >= self.fall_speed[g]]
+        if len(due):
+            self.fall_time[due] -= self.fall_speed[due]
+            ok = due[self.fits(due, self.pos_x[due], self.pos_y[due] + 1)]
+            self.pos_y[ok] += 1
+            self.lock_timer[ok] = 0
+
+        # Lock delay
+        landed = ~self.fits(g, self.pos_x[g], self.pos_y[g] + 1)
+        g, dt = g[landed], dt[landed]
+        if len(g):
+            self.lock_timer[g] += dt
+            self._lock(g[self.lock_timer[g] >= self.rules.lock_delay])
+
+    def _lock(self, g):
+        if not len(g):
+            return
+        rules = self.rules
+        shape, rotation = self.shape_idx[g], self.rotation[g]
+        shift = (self.pos_x[g] + MIN_X[shape, rotation] + WALL)[:, None]
+        ys = (self.pos_y[g] + PAD)[:, None] + _DY
+        self.board[g[:, None], ys] |= MASKS[shape, rotation] << shift
+        self.pieces_placed[g] += 1
+
+        lines = self._clear_full_rows(g)
+        self._lines[g] = lines
+        self.score[g] += self.score_per_line[lines] * self.level[g]
+        self.lines_cleared_total[g] += lines
+        new_level = self.lines_cleared_total[g] // rules.lines_per_level + 1
+        up = new_level > self.level[g]
+        if up.any():
+            gu, lv = g[up], new_level[up]
+            self.level[gu] = lv
+            self.fall_speed[gu] = np.maximum(
+                rules.min_fall_speed, rules.initial_fall_speed - (lv - 1) * rules.level_speed_decrease)
+        if rules.line_goal:
+            self.game_over[g] |= self.lines_cleared_total[g] >= rules.line_goal
+
+        # Spawn the next piece
+        self.shape_idx[g] = self.next_idx[g]
+        self.rotation[g] = 0
+        self.pos_x[g] = self.spawn_x[self.shape_idx[g]]
+        self.pos_y[g] = 0
+        self.can_hold[g] = True
+        self.lock_timer[g] = 0
+        self.next_idx[g] = self._draw(g)
+        self.game_over[g] |= ~self.fits(g, self.pos_x[g], self.pos_y[g])
+
+    def _clear_full_rows(self, g):
+        """Clear full rows of the given games; returns lines cleared per game."""
+        height = self.rules.height
+        well = self.board[g, PAD:PAD + height]
+        full = well == self.solid_row
+        lines = full.sum(axis=1)
+        hit = np.nonzero(lines)[0]
+        if len(hit):
+            # Stable sort puts full rows first and keeps the others in order.
+            order = np.argsort(~full[hit], axis=1, kind="stable")
+            kept = np.take_along_axis(well[hit], order, axis=1)
+            kept[np.arange(height) < lines[hit][:, None]] = self.empty_row
+            self.board[g[hit], PAD:PAD + height] = kept
+        return lines
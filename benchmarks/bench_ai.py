@@ -0,0 +1,51 @@
+"""
+Benchmark: the built-in autoplayer, in pieces per second of whole games
+(planning plus the engine ticks that play each move), at the default
+lookahead of one queued piece and at three.
+
+Run: python benchmarks/bench_ai.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai import AutoPlayer
+import engine
+from engine import TetrisEngine
+
+
+def pieces_per_second(seed, lookahead, pieces=150, repeat=3):
+    """Best of repeat games from the same seed, each cut off after pieces locks.
+
+    The placement cache is emptied first, or the repeats would only replay it.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        engine._placement_cache.clear()
+        game = TetrisEngine(seed)
+        player = AutoPlayer(seed, lookahead=lookahead)
+        start = time.perf_counter()
+        while not game.game_over and game.pieces_placed < pieces:
+            game.tick(player(game))
+        best = min(best, (time.perf_counter() - start) / game.pieces_placed)
+    return 1 / best
+
+
+def bench():
+    return {
+        "pieces_per_s": pieces_per_second(1, 1),
+        "pieces_lookahead3_per_s": pieces_per_second(1, 3),
+    }
+
+
+def main():
+    r = bench()
+    print("autoplayer, lookahead 1: %8.0f pieces/s" % r["pieces_per_s"])
+    print("autoplayer, lookahead 3: %8.0f pieces/s" % r["pieces_lookahead3_per_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: sound bank startup, old per-sample loop vs bulk synthesis vs disk cache.
+
+Run: python benchmarks/bench_audio.py
+"""
+
+import array
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+
+# Same tones as tetris.SOUND_BANK (kept here so the benchmark never imports pygame).
+BANK = [(180, 35), (280, 45), (120, 25), (400, 80), (520, 60), (200, 300)]
+
+
+def loop_beep(freq, duration_ms, volume=0.15, sample_rate=synth.SAMPLE_RATE):
+    """The original per-sample implementation of tetris._beep."""
+    n = int(sample_rate * duration_ms / 1000.0)
+    buf = array.array("h")
+    for i in range(n):
+        val = int(32767 * volume * math.sin(2 * math.pi * freq * i / sample_rate))
+        buf.append(max(-32768, min(32767, val)))
+    return buf.tobytes()
+
+
+def _time(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def check_close(a, b, tolerance=1):
+    x, y = array.array("h", a), array.array("h", b)
+    assert len(x) == len(y)
+    assert max(abs(p - q) for p, q in zip(x, y)) <= tolerance
+
+
+def bench():
+    for freq, ms in BANK:
+        ref = loop_beep(freq, ms)
+        check_close(ref, synth.tone(freq, ms, use_numpy=False))
+        if synth.np is not None:
+            check_close(ref, synth.tone(freq, ms))
+
+    results = {}
+    results["loop_ms"] = 1000 * _time(lambda: [loop_beep(f, ms) for f, ms in BANK])
+
+    def table():
+        synth._period.cache_clear()
+        for f, ms in BANK:
+            synth.tone(f, ms, use_numpy=False)
+    results["table_ms"] = 1000 * _time(table)
+    if synth.np is not None:
+        results["numpy_ms"] = 1000 * _time(lambda: [synth.tone(f, ms) for f, ms in BANK])
+
+    cache_dir = tempfile.mkdtemp()
+    saved = synth.CACHE_DIR
+    synth.CACHE_DIR = cache_dir
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            for f, ms in BANK:
+                synth.cached_tone(f, ms)
+        results["cache_cold_ms"] = 1000 * _time(cold)
+        results["cache_warm_ms"] = 1000 * _time(lambda: [synth.cached_tone(f, ms) for f, ms in BANK])
+    finally:
+        synth.CACHE_DIR = saved
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    r = bench()
+    print("sound bank startup (6 tones)")
+    print("  per-sample loop : %7.2f ms" % r["loop_ms"])
+    print("  sine table      : %7.2f ms" % r["table_ms"])
+    if "numpy_ms" in r:
+        print("  numpy           : %7.2f ms" % r["numpy_ms"])
+    print("  disk cache cold : %7.2f ms" % r["cache_cold_ms"])
+    print("  disk cache warm : %7.2f ms" % r["cache_warm_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: BatchEngine vs one TetrisEngine at a time, with an equivalence check.
+
+Run: python benchmarks/bench_batch.py [games] [steps]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from batch import BatchEngine
+from engine import ACTIONS, HARD_DROP, TetrisEngine
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES
+from selfplay import GreedyPolicy
+
+
+def random_actions(seed, games, steps, hard_drop_bias=0.2):
+    """(steps, games) action array; hard drops are over-weighted so games progress."""
+    rng = np.random.default_rng(seed)
+    actions = rng.choice(np.array(ACTIONS), size=(steps, games))
+    actions[rng.random((steps, games)) < hard_drop_bias] = HARD_DROP
+    return actions
+
+
+def random_dts(seed, games, steps):
+    rng = np.random.default_rng(seed)
+    return rng.choice(np.array([0.0, 1 / 60.0, 0.05, 0.25]), size=(steps, games))
+
+
+def compare(game, batch, i):
+    assert game.board.rows == batch.rows(i), "board"
+    expected = (game.shape_idx, game.rotation, game.next_idx,
+                -1 if game.hold_idx is None else game.hold_idx, game.can_hold,
+                game.pos_x, game.pos_y, game.score, game.level, game.lines_cleared_total,
+                game.pieces_placed, game.fall_time, game.lock_timer, game.game_over)
+    got = (batch.shape_idx[i], batch.rotation[i], batch.next_idx[i], batch.hold_idx[i],
+           batch.can_hold[i], batch.pos_x[i], batch.pos_y[i], batch.score[i], batch.level[i],
+           batch.lines_cleared_total[i], batch.pieces_placed[i], batch.fall_time[i],
+           batch.lock_timer[i], batch.game_over[i])
+    assert expected == tuple(v.item() for v in got), (expected, got)
+
+
+def verify(games=64, steps=2000, seed=0, generator=DEFAULT_GENERATOR):
+    """Run the same seeds and actions through both engines and compare every step.
+
+    Half the games play random actions, half play scripted greedy moves.
+    """
+    seeds = [seed * 100003 + i for i in range(games)]
+    actions = random_actions(seed, games, steps)
+    dts = random_dts(seed + 1, games, steps)
+    singles = [TetrisEngine(s, generator) for s in seeds]
+    batch = BatchEngine(seeds, generator=generator)
+    greedy = GreedyPolicy()
+    for t in range(steps):
+        for i in range(games // 2, games):
+            actions[t, i] = greedy(singles[i])
+        batch.step(actions[t], dts[t])
+        for i, game in enumerate(singles):
+            game.step(int(actions[t, i]), float(dts[t, i]))
+            compare(game, batch, i)
+    return {"pieces": int(batch.pieces_placed.sum()), "lines": int(batch.lines_cleared_total.sum()),
+            "max_level": int(batch.level.max()), "game_overs": int(batch.game_over.sum())}
+
+
+def bench(games=4096, steps=300):
+    """Steps per second counted over live games only (finished games cost nothing)."""
+    seeds = list(range(games))
+    actions = random_actions(1, games, steps, hard_drop_bias=0.02)
+    batch = BatchEngine(seeds)
+    live_steps = 0
+    t = time.perf_counter()
+    for a in actions:
+        live_steps += games - int(batch.game_over.sum())
+        batch.step(a, 1 / 60.0)
+    batch_rate = live_steps / (time.perf_counter() - t)
+
+    single_games = min(games, 64)
+    singles = [TetrisEngine(s) for s in seeds[:single_games]]
+    live_steps = 0
+    t = time.perf_counter()
+    for a in actions:
+        for i, game in enumerate(singles):
+            live_steps += not game.game_over
+            game.step(int(a[i]), 1 / 60.0)
+    single_rate = live_steps / (time.perf_counter() - t)
+    return {"batch_steps_per_s": batch_rate, "single_steps_per_s": single_rate}
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    for generator in GENERATOR_NAMES:
+        v = verify(generator=generator)
+        print("equivalence, %-7s: ok (%d pieces, %d lines, level %d, %d game overs)"
+              % (generator, v["pieces"], v["lines"], v["max_level"], v["game_overs"]))
+    r = bench(games, steps)
+    print("single engine : %10.0f game-steps/s" % r["single_steps_per_s"])
+    print("batch (%5d)  : %10.0f game-steps/s   x%.1f"
+          % (games, r["batch_steps_per_s"], r["batch_steps_per_s"] / r["single_steps_per_s"]))
+
+
+if __name__ == "__main__":
+    main()
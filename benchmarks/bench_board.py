@@ -0,0 +1,162 @@
+"""
+Micro-benchmark: bitboard Board vs the old (x, y) -> color dict,
+and height-map hard drop vs stepping down with fits().
+
+Run: python benchmarks/bench_board.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import COLORS, GRID_WIDTH, GRID_HEIGHT, SHAPES, Board, get_shape_cells
+
+
+# Reference: the dict-based functions the Board replaced.
+
+def dict_valid_position(shape_matrix, pos_x, pos_y, locked):
+    for y, row in enumerate(shape_matrix):
+        for x, cell in enumerate(row):
+            if cell:
+                nx, ny = pos_x + x, pos_y + y
+                if nx < 0 or nx >= GRID_WIDTH or ny >= GRID_HEIGHT:
+                    return False
+                if ny >= 0 and (nx, ny) in locked:
+                    return False
+    return True
+
+
+def dict_clear_full_rows(locked):
+    full_rows = []
+    for y in range(GRID_HEIGHT):
+        if all((x, y) in locked for x in range(GRID_WIDTH)):
+            full_rows.append(y)
+    if not full_rows:
+        return 0
+    full_rows.sort()
+    new_locked = {}
+    for (x, y), color in locked.items():
+        if y in full_rows:
+            continue
+        num_below = sum(1 for r in full_rows if r > y)
+        new_locked[(x, y + num_below)] = color
+    locked.clear()
+    locked.update(new_locked)
+    return len(full_rows)
+
+
+def make_boards(seed, fill_from=8, full_rows=(12, 15, 17, 19)):
+    """Random stack below row fill_from with a few full rows; same cells in both forms."""
+    rng = random.Random(seed)
+    locked = {}
+    board = Board()
+    rows = list(board.rows)
+    colors = [bytearray(c) for c in board.colors]
+    for y in range(fill_from, GRID_HEIGHT):
+        for x in range(GRID_WIDTH):
+            if y in full_rows or rng.random() < 0.6:
+                code = rng.randrange(len(COLORS))
+                locked[(x, y)] = COLORS[code]
+                rows[y] |= 1 << x
+                colors[y][x] = code + 1
+    board.rows = rows
+    board.colors = colors
+    board.refresh()
+    return locked, board
+
+
+def probes(seed, count=2000):
+    rng = random.Random(seed)
+    return [(rng.randrange(len(SHAPES)), rng.randrange(4),
+             rng.randrange(-2, GRID_WIDTH), rng.randrange(-2, GRID_HEIGHT)) for _ in range(count)]
+
+
+def check_equivalent(locked, board, queries):
+    for s, r, x, y in queries:
+        assert dict_valid_position(get_shape_cells(s, r), x, y, locked) == board.fits(s, r, x, y)
+    locked, board = dict(locked), _copy(board)
+    assert dict_clear_full_rows(locked) == board.clear_full_rows()
+    for y in range(GRID_HEIGHT):
+        for x in range(GRID_WIDTH):
+            assert locked.get((x, y)) == board.color_at(x, y)
+
+
+def _copy(board):
+    b = Board()
+    b.rows = tuple(board.rows)
+    b.colors = tuple(board.colors)
+    b.heights = tuple(board.heights)
+    b.filled = board.filled
+    b.unchecked = board.unchecked
+    return b
+
+
+def bench(number=20):
+    locked, board = make_boards(1)
+    queries = probes(2)
+    check_equivalent(locked, board, queries)
+    matrices = [(get_shape_cells(s, r), x, y) for s, r, x, y in queries]
+
+    def dict_collide():
+        for m, x, y in matrices:
+            dict_valid_position(m, x, y, locked)
+
+    def board_collide():
+        fits = board.fits
+        for s, r, x, y in queries:
+            fits(s, r, x, y)
+
+    drops = [q for q in queries if board.fits(*q)]
+
+    def loop_drop():
+        fits = board.fits
+        for s, r, x, y in drops:
+            while fits(s, r, x, y + 1):
+                y += 1
+
+    def height_drop():
+        drop_y = board.drop_y
+        for s, r, x, y in drops:
+            drop_y(s, r, x, y)
+
+    def dict_clear():
+        dict_clear_full_rows(dict(locked))
+
+    def board_clear():
+        _copy(board).clear_full_rows()
+
+    def dict_copy():
+        dict(locked)
+
+    def board_copy():
+        _copy(board)
+
+    results = {}
+    n = len(queries) * number
+    results["collide_dict"] = n / timeit.timeit(dict_collide, number=number)
+    results["collide_board"] = n / timeit.timeit(board_collide, number=number)
+    n = len(drops) * number
+    results["drop_loop"] = n / timeit.timeit(loop_drop, number=number)
+    results["drop_heights"] = n / timeit.timeit(height_drop, number=number)
+    # Clearing mutates, so each run works on a fresh copy; subtract the copy cost.
+    reps = number * 50
+    results["clear_dict"] = reps / max(1e-9, timeit.timeit(dict_clear, number=reps) - timeit.timeit(dict_copy, number=reps))
+    results["clear_board"] = reps / max(1e-9, timeit.timeit(board_clear, number=reps) - timeit.timeit(board_copy, number=reps))
+    return results
+
+
+def main():
+    r = bench()
+    print("valid_position  dict: %10.0f /s   board: %10.0f /s   x%.1f"
+          % (r["collide_dict"], r["collide_board"], r["collide_board"] / r["collide_dict"]))
+    print("hard drop       loop: %10.0f /s   heights: %8.0f /s   x%.1f"
+          % (r["drop_loop"], r["drop_heights"], r["drop_heights"] / r["drop_loop"]))
+    print("clear_full_rows dict: %10.0f /s   board: %10.0f /s   x%.1f"
+          % (r["clear_dict"], r["clear_board"], r["clear_board"] / r["clear_dict"]))
+
+
+if __name__ == "__main__":
+    main()
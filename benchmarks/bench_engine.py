@@ -0,0 +1,157 @@
+"""
+Benchmark: whole-game engine throughput and the per-piece hot paths.
+
+- full-game steps per second under random actions and under a scripted game
+  (moves recorded from the autoplayer, then re-run through the engine alone)
+- ghost_y() and fits() per second on a mid-game board
+- the same steps and fits() on the 40x100 "huge" rule set, to track what
+  board size costs the hot paths (wider rows are multi-digit ints, and each
+  lock copies the row tuples)
+- clear_full_rows() on crafted dense boards: one to four full rows under a
+  stack that is full except for one hole per row
+- piece generation per randomizer, and a 5-piece preview read
+
+Run: python benchmarks/bench_engine.py
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai import AutoPlayer
+from engine import ACTIONS, DEFAULT_RULES, FULL_ROW, GRID_HEIGHT, GRID_WIDTH, HARD_DROP, RULESETS, Board, TetrisEngine
+from pieces import GENERATOR_NAMES, PieceQueue
+
+
+def random_actions(seed, count, hard_drop_bias=0.05):
+    rng = random.Random(seed)
+    return [HARD_DROP if rng.random() < hard_drop_bias else rng.choice(ACTIONS) for _ in range(count)]
+
+
+def scripted_actions(seed, pieces):
+    """Actions of an autoplayer game, one per tick, for pieces pieces."""
+    game = TetrisEngine(seed)
+    player = AutoPlayer()
+    actions = []
+    while not game.game_over and game.pieces_placed < pieces:
+        action = player(game)
+        actions.append(action)
+        game.tick(action)
+    return actions
+
+
+def steps_per_second(seed, actions, laps=1, repeat=3, rules=DEFAULT_RULES):
+    """Best-of-repeat rate of game.tick(action), playing the action list laps
+    times from a fresh game and restarting it on game over."""
+    best = 0.0
+    for _ in range(repeat):
+        game = TetrisEngine(seed, rules=rules)
+        t = time.perf_counter()
+        for _ in range(laps):
+            game.reset(seed)
+            for action in actions:
+                if game.game_over:
+                    game.reset(seed)
+                game.tick(action)
+        best = max(best, laps * len(actions) / (time.perf_counter() - t))
+    return best
+
+
+def dense_board(full_rows, seed=0):
+    """A 16-row stack with one hole per row, plus full_rows full rows spread through it."""
+    rng = random.Random(seed)
+    board = Board()
+    rows = list(board.rows)
+    colors = list(board.colors)
+    full = set(rng.sample(range(GRID_HEIGHT - 16, GRID_HEIGHT), full_rows))
+    for y in range(GRID_HEIGHT - 16, GRID_HEIGHT):
+        mask = FULL_ROW if y in full else FULL_ROW & ~(1 << rng.randrange(GRID_WIDTH))
+        rows[y] = mask
+        colors[y] = bytes(rng.randrange(1, 8) if mask >> x & 1 else 0 for x in range(GRID_WIDTH))
+    board.rows = rows
+    board.colors = colors
+    board.refresh()
+    return board
+
+
+def midgame_board(seed=0):
+    game = TetrisEngine(seed)
+    player = AutoPlayer()
+    while game.pieces_placed < 40:
+        game.tick(player(game))
+    return game
+
+
+def fits_per_second(board, x_range):
+    probes = [(s, r, x, y) for s in range(7) for r in range(4) for x in x_range
+              for y in (0, len(board.rows) * 2 // 5, len(board.rows) * 4 // 5)]
+    fits = board.fits
+
+    def collide():
+        for s, r, x, y in probes:
+            fits(s, r, x, y)
+    return len(probes) * 50 / min(timeit.repeat(collide, number=50, repeat=5))
+
+
+def bench(steps=30000):
+    results = {}
+    results["steps_random_per_s"] = steps_per_second(1, random_actions(1, steps))
+    scripted = scripted_actions(2, 300)
+    results["steps_scripted_per_s"] = steps_per_second(2, scripted, laps=max(1, steps // len(scripted)))
+
+    game = midgame_board()
+    number = 20000
+    results["ghost_y_per_s"] = number / min(timeit.repeat(game.ghost_y, number=number, repeat=5))
+    results["fits_per_s"] = fits_per_second(game.board, range(-1, GRID_WIDTH))
+
+    huge = RULESETS["huge"]
+    results["steps_random_huge_per_s"] = steps_per_second(1, random_actions(1, steps), rules=huge)
+    big = TetrisEngine(3, rules=huge)
+    for action in random_actions(3, 20000, hard_drop_bias=0.02):
+        if big.game_over:
+            break
+        big.tick(action)
+    # The same number of probes as on the default board, spread over the width.
+    results["fits_huge_per_s"] = fits_per_second(big.board, range(-1, huge.width, 4))
+
+    # Clearing mutates, so every run clears fresh copies made outside the timing.
+    for lines in (1, 4):
+        board = dense_board(lines)
+        best = float("inf")
+        for _ in range(5):
+            copies = [board.copy() for _ in range(2000)]
+            t = time.perf_counter()
+            for b in copies:
+                b.clear_full_rows()
+            best = min(best, time.perf_counter() - t)
+        results["clear_dense_%d_per_s" % lines] = len(copies) / best
+
+    pieces = 100000
+    for name in GENERATOR_NAMES:
+        best = min(timeit.repeat(lambda: PieceQueue(1, name)[pieces - 1], number=1, repeat=3))
+        results["pieces_%s_per_s" % name] = pieces / best
+    results["preview_per_s"] = number / min(timeit.repeat(lambda: game.preview(5), number=number, repeat=5))
+    return results
+
+
+def main():
+    r = bench()
+    print("full game, random actions : %10.0f ticks/s" % r["steps_random_per_s"])
+    print("full game, scripted (AI)  : %10.0f ticks/s" % r["steps_scripted_per_s"])
+    print("ghost_y                   : %10.0f /s" % r["ghost_y_per_s"])
+    print("fits                      : %10.0f /s" % r["fits_per_s"])
+    print("huge board, random actions: %10.0f ticks/s" % r["steps_random_huge_per_s"])
+    print("huge board, fits          : %10.0f /s" % r["fits_huge_per_s"])
+    print("clear, dense board, 1 row : %10.0f /s" % r["clear_dense_1_per_s"])
+    print("clear, dense board, 4 rows: %10.0f /s" % r["clear_dense_4_per_s"])
+    for name in GENERATOR_NAMES:
+        print("pieces, %-18s: %10.0f /s" % (name, r["pieces_%s_per_s" % name]))
+    print("preview(5)                : %10.0f /s" % r["preview_per_s"])
+
+
+if __name__ == "__main__":
+    main()
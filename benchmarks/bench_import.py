@@ -0,0 +1,73 @@
+"""
+Import-time budget: importing the rules must be cheap and display-free.
+
+Runs fresh interpreters with -X importtime and fails (exit status 1) if
+engine's own import cost exceeds the budget, if importing engine loads the
+pygame.display module at all, or if importing tetris initializes the
+display. (tetris imports pygame, which always loads pygame.display; it must
+not open it before main() runs.)
+
+Run: python benchmarks/bench_import.py [budget_ms]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 3.0
+
+CHECK = """
+import sys
+import %s
+display = sys.modules.get("pygame.display")
+print(display is not None, display is not None and display.get_init())
+"""
+
+
+def import_times(module, pycache):
+    """({module: (self_us, cumulative_us)}, display module loaded, display initialized) for a fresh import."""
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    cmd = [sys.executable, "-X", "importtime", "-c", CHECK % module]
+    # The first run compiles bytecode so the measured run reflects a normal install.
+    subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, check=True)
+    out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    # The last line: pygame prints a banner of its own on import.
+    loaded, initialized = (flag == "True" for flag in out.stdout.splitlines()[-1].split())
+    return times, loaded, initialized
+
+
+def bench():
+    pycache = tempfile.mkdtemp()
+    engine_times, engine_display, _ = import_times("engine", pycache)
+    tetris_times, _, tetris_display_init = import_times("tetris", pycache)
+    return {
+        "engine_self_ms": engine_times["engine"][0] / 1000.0,
+        "engine_cumulative_ms": engine_times["engine"][1] / 1000.0,
+        "engine_loads_pygame_display": engine_display,
+        "tetris_inits_display": tetris_display_init,
+        "tetris_cumulative_ms": tetris_times["tetris"][1] / 1000.0,
+    }
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    r = bench()
+    print("import engine : %6.2f ms self, %6.2f ms with stdlib deps" % (r["engine_self_ms"], r["engine_cumulative_ms"]))
+    print("import tetris : %6.2f ms (pygame import, no window)" % r["tetris_cumulative_ms"])
+    ok = (r["engine_self_ms"] <= budget and not r["engine_loads_pygame_display"]
+          and not r["tetris_inits_display"])
+    print("budget %.1f ms: %s" % (budget, "ok" if ok else "FAILED"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: input-to-state latency and auto-repeat speed.
+
+- latency: a thread posts LEFT/RIGHT key presses at random moments while the
+  main thread runs the game loop's input path (drain events, Controls.poll,
+  engine step); the figure is the time from posting a key to the piece having
+  moved. Measured with events drained every tick (as the game does) and, for
+  comparison, once per rendered frame.
+- repeat: moves per second out of a held key with the default DAS/ARR, with
+  poll() called at the tick rate.
+
+Uses the dummy SDL video driver. Run: python benchmarks/bench_input.py
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from controls import DAS, Controls
+from engine import LEFT, RIGHT, TICK_RATE, FixedStep, TetrisEngine
+from profiler import percentile
+
+KEYS = {pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
+
+
+def _post_keys(stop, seed, gap):
+    """Alternate LEFT and RIGHT taps, each stamped with the time it was sent."""
+    rng = random.Random(seed)
+    keys = (pygame.K_LEFT, pygame.K_RIGHT)
+    i = 0
+    while not stop.is_set():
+        time.sleep(rng.uniform(*gap))
+        key = keys[i & 1]
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, sent=time.perf_counter()))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+        i += 1
+
+
+def latency(rate, seconds=3.0, seed=0, gap=(0.015, 0.045)):
+    """Sorted key-to-move latencies in seconds with events drained rate times a second."""
+    game = TetrisEngine(seed)
+    controls = Controls()
+    loop = FixedStep(rate, max_lag=0)
+    samples = []
+    stop = threading.Event()
+    poster = threading.Thread(target=_post_keys, args=(stop, seed, gap))
+    pygame.event.clear()
+    poster.start()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        loop.wait()
+        loop.due()
+        now = time.perf_counter()
+        sent = []
+        for event in pygame.event.get((pygame.KEYDOWN, pygame.KEYUP)):
+            if event.key not in KEYS:
+                continue
+            if event.type == pygame.KEYDOWN:
+                controls.press(KEYS[event.key], now)
+                sent.append(event.sent)
+            else:
+                controls.release(KEYS[event.key], now)
+        moved = 0
+        for action in controls.poll(now):
+            moved += "move" in game.step(action)
+        if moved:
+            done = time.perf_counter()
+            samples.extend(done - t for t in sent)
+        game.pos_y = 0  # keep the piece in the air
+    stop.set()
+    poster.join()
+    return sorted(samples)
+
+
+def repeat_rate(seconds=1.0):
+    """Moves per second from a key held past its DAS, polled every tick."""
+    controls = Controls()
+    controls.press(RIGHT, 0.0)
+    ticks = int((DAS + seconds) * TICK_RATE)
+    moves = 0
+    for i in range(1, ticks + 1):
+        now = i / TICK_RATE
+        emitted = len(controls.poll(now))
+        if now > DAS:
+            moves += emitted
+    return moves / ((ticks / TICK_RATE) - DAS)
+
+
+def bench():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    tick = latency(TICK_RATE)
+    frame = latency(60, seed=1)
+    pygame.quit()
+    return {
+        "latency_p50_ms": percentile(tick, 50) * 1000,
+        "latency_p99_ms": percentile(tick, 99) * 1000,
+        "frame_polled_latency_p50_ms": percentile(frame, 50) * 1000,
+        "frame_polled_latency_p99_ms": percentile(frame, 99) * 1000,
+        "repeat_per_s": repeat_rate(),
+    }
+
+
+def main():
+    r = bench()
+    print("input-to-state, polled per tick : p50 %5.2f ms  p99 %5.2f ms" % (r["latency_p50_ms"], r["latency_p99_ms"]))
+    print("input-to-state, polled per frame: p50 %5.2f ms  p99 %5.2f ms"
+          % (r["frame_polled_latency_p50_ms"], r["frame_polled_latency_p99_ms"]))
+    print("auto-repeat                     : %5.0f moves/s" % r["repeat_per_s"])
+
+
+if __name__ == "__main__":
+    main()
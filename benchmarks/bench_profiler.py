@@ -0,0 +1,57 @@
+"""
+Benchmark: cost of the frame profiler, enabled and disabled.
+
+Times one instrumented phase (mark + add) against the same loop without
+instrumentation, and scales it to the calls the main loop makes per frame.
+
+Run: python benchmarks/bench_profiler.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiler import NULL_PROFILER, Profiler
+
+# mark/add pairs per rendered frame at 60 FPS with 240 Hz ticks: four loop
+# passes of input, actions and one tick each, then draw, side and flip
+CALLS_PER_FRAME = 15
+
+
+def bench(number=200000):
+    def bare():
+        pass
+
+    def timed(prof):
+        def phase():
+            start = prof.mark()
+            prof.add("phase", start)
+        return phase
+
+    prof = Profiler(trace_limit=number)
+    results = {}
+    base = min(timeit.repeat(bare, number=number, repeat=5)) / number
+    for name, p in (("disabled", NULL_PROFILER), ("enabled", prof)):
+        cost = min(timeit.repeat(timed(p), number=number, repeat=5)) / number - base
+        results[name + "_ns_per_phase"] = cost * 1e9
+        results[name + "_us_per_frame"] = cost * CALLS_PER_FRAME * 1e6
+    frame = timeit.timeit(prof.end_frame, number=1000) / 1000
+    results["end_frame_us"] = frame * 1e6
+    results["stats_us"] = timeit.timeit(prof.stats, number=100) / 100 * 1e6
+    return results
+
+
+def main():
+    r = bench()
+    print("disabled : %6.0f ns per phase   %6.2f us per frame"
+          % (r["disabled_ns_per_phase"], r["disabled_us_per_frame"]))
+    print("enabled  : %6.0f ns per phase   %6.2f us per frame (+ end_frame %.2f us)"
+          % (r["enabled_ns_per_phase"], r["enabled_us_per_frame"], r["end_frame_us"]))
+    print("stats()  : %6.1f us (overlay refresh, twice a second)" % r["stats_us"])
+    print("budget   : 16667 us per frame at 60 FPS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: frame render time with the dummy SDL video driver (no window).
+
+- frame: Renderer.draw + display.update per frame over a scripted game
+  (autoplayer moves, 240 Hz ticks, a frame every fourth tick)
+- full frame: the same after invalidate(), as after an overlay
+- sidebar: draw_sidebar() alone
+- stack rebuild: redrawing the locked stack after a piece locks
+
+Run: python benchmarks/bench_render.py
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+import tetris
+from bench_engine import scripted_actions
+from engine import TetrisEngine
+
+
+def _best(fn, number, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - t)
+    return best / number
+
+
+def bench(pieces=150, seed=3):
+    screen = tetris.init()
+    renderer = tetris.Renderer(screen)
+    tetris.get_fonts()
+    actions = scripted_actions(seed, pieces)
+
+    best = float("inf")
+    for _ in range(3):
+        game = TetrisEngine(seed)
+        renderer.invalidate()
+        frames = 0
+        elapsed = 0.0
+        for i, action in enumerate(actions):
+            game.tick(action)
+            if i % 4 == 0:
+                t = time.perf_counter()
+                pygame.display.update(renderer.draw(game, 0))
+                elapsed += time.perf_counter() - t
+                frames += 1
+        best = min(best, elapsed / frames)
+
+    def full_frame():
+        renderer.invalidate()
+        pygame.display.update(renderer.draw(game, 0))
+
+    def stack_rebuild():
+        renderer._rebuild_stack(game.board)
+
+    results = {
+        "frame_ms": best * 1000,
+        "full_frame_ms": _best(full_frame, 50) * 1000,
+        "sidebar_ms": _best(lambda: tetris.draw_sidebar(screen, game.preview(tetris.PREVIEW_COUNT), game.hold_idx,
+                                                        game.score, 0, game.level, game.lines_cleared_total),
+                            200) * 1000,
+        "stack_rebuild_ms": _best(stack_rebuild, 200) * 1000,
+    }
+    pygame.quit()
+    tetris.screen = None
+    return results
+
+
+def main():
+    r = bench()
+    print("frame (dirty rects) : %7.3f ms" % r["frame_ms"])
+    print("full frame          : %7.3f ms" % r["full_frame_ms"])
+    print("sidebar             : %7.3f ms" % r["sidebar_ms"])
+    print("stack rebuild       : %7.3f ms" % r["stack_rebuild_ms"])
+
+
+if __name__ == "__main__":
+    main()
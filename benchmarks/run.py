@@ -0,0 +1,188 @@
+"""
+Benchmark suite: run every benchmark headless, write the results as JSON and
+compare them with a stored baseline.
+
+    python benchmarks/run.py                          # run all, compare with baseline.json
+    python benchmarks/run.py --only engine,render     # a subset
+    python benchmarks/run.py --out results.json       # also write this run's results
+    python benchmarks/run.py --save-baseline          # make this run the new baseline
+
+Each suite is a bench_<name>.py module whose bench() returns {metric: value}.
+Metrics with a time unit in their name (ms, us, ns) are better when lower,
+other numbers are rates and better when higher, and booleans must not change.
+A metric is a regression when it is worse than the baseline by more than
+--threshold (a fraction). Each suite runs --repeat times and the best value
+of every metric counts, which filters out most scheduling noise. Shared or
+throttled machines also drift as a whole, so a fixed pure-Python workload is
+timed next to each suite and results are compared relative to it (turn this
+off with --absolute). Render benchmarks use the dummy SDL video driver.
+Baselines are only comparable on the machine that recorded them; the exit
+status is 1 if anything regressed.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(1, os.path.dirname(HERE))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+SUITES = ("board", "engine", "render", "input", "audio", "batch", "profiler", "import", "ai")
+BASELINE = os.path.join(HERE, "baseline.json")
+THRESHOLD = 0.25
+TIME_UNITS = {"ms", "us", "ns"}
+
+
+def lower_is_better(metric):
+    return bool(TIME_UNITS & set(metric.split("_")))
+
+
+def calibrate(n=200000):
+    """Loops per second of a fixed interpreter workload, best of five."""
+    def work():
+        d = {}
+        total = 0
+        for i in range(n):
+            total += i * i & 0xFF
+            d[i & 63] = total
+        return total
+    best = float("inf")
+    for _ in range(5):
+        t = time.perf_counter()
+        work()
+        best = min(best, time.perf_counter() - t)
+    return n / best
+
+
+def best_of(runs):
+    """Merge repeated runs of one suite, keeping the best value of each metric."""
+    merged = dict(runs[0])
+    for run in runs[1:]:
+        for metric, value in run.items():
+            if isinstance(value, bool):
+                merged[metric] = merged[metric] or value
+            elif lower_is_better(metric):
+                merged[metric] = min(merged[metric], value)
+            else:
+                merged[metric] = max(merged[metric], value)
+    return merged
+
+
+def run_suites(names, repeat=1):
+    """({suite: {metric: value}}, {suite: calibration}), best of repeat runs.
+
+    A suite whose dependencies are missing is skipped.
+    """
+    results = {}
+    calibration = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module("bench_" + name)
+        except ImportError as e:
+            print("%-9s skipped (%s)" % (name, e), file=sys.stderr)
+            continue
+        runs = []
+        speeds = []
+        for _ in range(repeat):
+            speeds.append(calibrate())
+            runs.append(module.bench())
+        results[name] = best_of(runs)
+        calibration[name] = max(speeds)
+        print("%-9s %6.1f s" % (name, time.perf_counter() - start), file=sys.stderr)
+    return results, calibration
+
+
+def compare(results, baseline, threshold=THRESHOLD, speeds=None):
+    """[(suite, metric, base, value, change, regressed)] for metrics in both runs.
+
+    change is the relative improvement: positive is better, negative worse.
+    speeds maps a suite to how much faster the machine ran than when the
+    baseline was recorded; changes are corrected by it.
+    """
+    rows = []
+    for suite, metrics in sorted(results.items()):
+        speed = (speeds or {}).get(suite, 1.0)
+        for metric, value in sorted(metrics.items()):
+            base = baseline.get(suite, {}).get(metric)
+            if base is None:
+                continue
+            if isinstance(value, bool) or isinstance(base, bool):
+                change = 0.0 if value == base else -1.0
+            elif not base:
+                continue
+            elif lower_is_better(metric):
+                change = base / (value * speed) - 1 if value else float("inf")
+            else:
+                change = value / (base * speed) - 1
+            rows.append((suite, metric, base, value, change, change < -threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare with a baseline.")
+    parser.add_argument("--only", help="comma-separated suites (default: %s)" % ",".join(SUITES))
+    parser.add_argument("--out", help="write this run's results as JSON")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per suite; the best value counts")
+    parser.add_argument("--absolute", action="store_true", help="compare raw numbers, without calibration")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown as a fraction (default %.2f)" % THRESHOLD)
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else SUITES
+    unknown = sorted(set(names) - set(SUITES))
+    if unknown:
+        parser.error("unknown suite(s): %s" % ", ".join(unknown))
+    results, calibration = run_suites(names, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "calibration": calibration,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        print("baseline written to %s" % args.baseline)
+        return
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except IOError:
+        print(text)
+        print("no baseline at %s (run with --save-baseline)" % args.baseline, file=sys.stderr)
+        return
+    speeds = None
+    if not args.absolute:
+        base_calibration = baseline.get("calibration", {})
+        speeds = {suite: calibration[suite] / base_calibration[suite]
+                  for suite in calibration if suite in base_calibration}
+        for suite in sorted(speeds):
+            print("%-9s machine speed x%.2f vs baseline" % (suite, speeds[suite]))
+    regressions = 0
+    for suite, metric, base, value, change, regressed in compare(results, baseline["results"],
+                                                                 args.threshold, speeds):
+        regressions += regressed
+        print("%-9s %-30s %14.4g %14.4g  %+7.1f%%%s"
+              % (suite, metric, base, value, 100 * change, "  REGRESSION" if regressed else ""))
+    print("%d regression(s) beyond %.0f%%" % (regressions, 100 * args.threshold))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
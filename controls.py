@@ -0,0 +1,110 @@
+"""
+Player input: timestamped key presses turned into engine actions with
+delayed auto-shift (DAS) and auto-repeat (ARR). No pygame.
+
+    controls = Controls(das=0.133, arr=0.010)
+    controls.press(LEFT, t)          # key went down at time t (seconds)
+    controls.release(LEFT, t)        # and up again
+    for action in controls.poll(now):
+        game.step(action)
+
+A held LEFT or RIGHT moves once on press, waits das seconds, then repeats
+every arr seconds; arr=0 slides to the wall at once. SOFT_DROP repeats every
+soft_drop_arr seconds from the press. Other actions fire once per press.
+Repeats are timed from the press timestamp, not from when poll() happens to
+run, so calling poll() at the simulation tick rate keeps repeat speeds above
+the frame rate. benchmarks/bench_input.py measures input-to-state latency.
+"""
+
+from engine import DEFAULT_RULES, LEFT, RIGHT, SOFT_DROP
+
+DAS = 0.133  # seconds a direction is held before it repeats
+ARR = 0.010  # seconds between repeats (100 moves per second)
+SOFT_DROP_ARR = 0.010
+SHIFTS = (LEFT, RIGHT)
+
+
+def max_repeats(rules):
+    """Most repeats one poll() emits for a key: a wall-to-wall slide or a full drop.
+    Moves past a wall are no-ops, so arr=0 emits this many every poll."""
+    return {LEFT: rules.width, RIGHT: rules.width, SOFT_DROP: rules.height}
+
+
+class Controls:
+    """Held keys and pending presses, in press order.
+
+    Only the most recently pressed of LEFT and RIGHT repeats; releasing it
+    hands the repeat back to the other one if that is still held, after a
+    fresh DAS. rules sets the board size repeats are capped to.
+    """
+
+    def __init__(self, das=DAS, arr=ARR, soft_drop_arr=SOFT_DROP_ARR, rules=DEFAULT_RULES):
+        self.das = das
+        self.arr = arr
+        self.soft_drop_arr = soft_drop_arr
+        self.max_repeats = max_repeats(rules)
+        self.clear()
+
+    def clear(self):
+        """Forget held keys and pending presses (pause, game over, autoplay)."""
+        self.queue = []  # (time, action, pressed)
+        self.held = {}  # action -> time of its next repeat
+        self.shift = None  # the direction that repeats
+
+    def press(self, action, t):
+        self.queue.append((t, action, True))
+
+    def release(self, action, t):
+        self.queue.append((t, action, False))
+
+    def poll(self, now):
+        """Actions due by time now, in order: queued presses interleaved with repeats."""
+        actions = []
+        queue = self.queue
+        i = 0
+        while i < len(queue) and queue[i][0] <= now:
+            t, action, pressed = queue[i]
+            self._repeat(t, actions)
+            if pressed:
+                self._press(action, t, actions)
+            else:
+                self._release(action, t)
+            i += 1
+        del queue[:i]
+        self._repeat(now, actions)
+        return actions
+
+    def _press(self, action, t, actions):
+        actions.append(action)
+        if action in SHIFTS:
+            self.held[action] = t + self.das
+            self.shift = action
+        elif action == SOFT_DROP:
+            self.held[action] = t + self.soft_drop_arr
+
+    def _release(self, action, t):
+        if self.held.pop(action, None) is None:
+            return
+        if action == self.shift:
+            other = RIGHT if action == LEFT else LEFT
+            self.shift = other if other in self.held else None
+            if self.shift is not None:
+                self.held[other] = t + self.das
+
+    def _repeat(self, now, actions):
+        """Append the repeats of held keys that came due by now."""
+        held = self.held
+        for action, due in held.items():
+            if due > now or (action in SHIFTS and action != self.shift):
+                continue
+            period = self.soft_drop_arr if action == SOFT_DROP else self.arr
+            limit = self.max_repeats[action]
+            if period <= 0:
+                # Instant repeat: one full slide per later poll.
+                actions.extend((action,) * limit)
+                held[action] = now + 1e-9
+                continue
+            count = min(limit, int((now - due) / period) + 1)
+            actions.extend((action,) * count)
+            due += count * period
+            held[action] = due if due > now else now + period
@@ -0,0 +1,1053 @@
+"""
+Headless Tetris rules: board, pieces, scoring and lock delay. No pygame.
+
+The game is advanced with explicit TetrisEngine.step(action, dt) calls, so the
+same rules drive the pygame window, bots and simulations. Real-time front ends
+run it at a fixed TICK_RATE (see FixedStep), independent of the frame rate.
+Board size, timing and scoring come from a Rules; RULESETS holds the named
+modes.
+"""
+
+import struct
+import time
+from collections import OrderedDict, namedtuple
+from operator import attrgetter
+
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES, PieceQueue
+
+# Tetromino colors (I, O, T, S, Z, L, J)
+COLORS = [
+    (0, 220, 240), (240, 220, 60), (180, 90, 240),
+    (60, 200, 100), (220, 70, 70), (240, 160, 50), (60, 110, 240),
+]
+GARBAGE_COLOR = (110, 110, 122)
+# Board color codes 1..7 are shape_idx + 1; GARBAGE_CODE marks versus garbage.
+GARBAGE_CODE = len(COLORS) + 1
+CELL_COLORS = COLORS + [GARBAGE_COLOR]  # indexed by code - 1
+
+# Shapes: each is a list of 4 rotation states (0°, 90°, 180°, 270°)
+# I, O, T, S, Z, L, J
+SHAPES = [
+    [[[0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0], [0, 0, 0, 0]],
+     [[0, 0, 1, 0], [0, 0, 1, 0], [0, 0, 1, 0], [0, 0, 1, 0]],
+     [[0, 0, 0, 0], [0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0]],
+     [[0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0]]],
+    [[[1, 1], [1, 1]], [[1, 1], [1, 1]], [[1, 1], [1, 1]], [[1, 1], [1, 1]]],
+    [[[0, 1, 0], [1, 1, 1], [0, 0, 0]],
+     [[0, 1, 0], [0, 1, 1], [0, 1, 0]],
+     [[0, 0, 0], [1, 1, 1], [0, 1, 0]],
+     [[0, 1, 0], [1, 1, 0], [0, 1, 0]]],
+    [[[0, 1, 1], [1, 1, 0], [0, 0, 0]],
+     [[0, 1, 0], [0, 1, 1], [0, 0, 1]],
+     [[0, 0, 0], [0, 1, 1], [1, 1, 0]],
+     [[1, 0, 0], [1, 1, 0], [0, 1, 0]]],
+    [[[1, 1, 0], [0, 1, 1], [0, 0, 0]],
+     [[0, 0, 1], [0, 1, 1], [0, 1, 0]],
+     [[0, 0, 0], [1, 1, 0], [0, 1, 1]],
+     [[0, 1, 0], [1, 1, 0], [1, 0, 0]]],
+    [[[1, 1, 1], [1, 0, 0], [0, 0, 0]],
+     [[0, 1, 1], [0, 1, 0], [0, 1, 0]],
+     [[0, 0, 0], [0, 0, 1], [1, 1, 1]],
+     [[0, 1, 0], [0, 1, 0], [0, 1, 1]]],
+    [[[1, 1, 1], [0, 0, 1], [0, 0, 0]],
+     [[0, 1, 0], [0, 1, 0], [0, 1, 1]],
+     [[0, 0, 0], [1, 0, 0], [1, 1, 1]],
+     [[0, 1, 1], [0, 1, 0], [0, 1, 0]]],
+]
+
+# Defaults for Rules (the marathon rule set); see RULESETS for the variants.
+
+# Grid
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Scoring
+SCORE_PER_LINE = (0, 100, 300, 500, 800)
+SOFT_DROP_POINTS = 1
+HARD_DROP_POINTS = 2
+# Versus: garbage lines sent per lines cleared, (0, 0, 1, 2, 4)
+GARBAGE_PER_LINE = tuple(points // 200 for points in SCORE_PER_LINE)
+
+# Level & timing
+INITIAL_FALL_SPEED = 0.72
+LEVEL_SPEED_DECREASE = 0.065
+MIN_FALL_SPEED = 0.06
+LINES_PER_LEVEL = 10
+LOCK_DELAY = 0.5  # seconds to move/rotate after landing before lock
+
+# Fixed simulation step
+TICK_RATE = 240  # ticks per second
+TICK = 1.0 / TICK_RATE
+MAX_LAG = 0.25  # seconds of backlog simulated after a stall; the rest is dropped
+
+# Actions accepted by TetrisEngine.step
+NONE = 0
+LEFT = 1
+RIGHT = 2
+SOFT_DROP = 3
+ROTATE = 4
+HARD_DROP = 5
+HOLD = 6
+ACTIONS = (NONE, LEFT, RIGHT, SOFT_DROP, ROTATE, HARD_DROP, HOLD)
+
+
+def get_shape_cells(shape_idx, rotation):
+    """Return the 4x4 or 3x3 matrix for the shape at given rotation (0-3)."""
+    s = SHAPES[shape_idx]
+    r = rotation % len(s)
+    return s[r]
+
+
+FULL_ROW = (1 << GRID_WIDTH) - 1
+
+# Precomputed per (shape, rotation) for one board size; offsets are relative
+# to the matrix origin.
+#   cells      ((x, y), ...) occupied cells
+#   min_x ..   bounding box of the occupied cells
+#   width      max_x - min_x + 1
+#   row_masks  ((dy, mask), ...) occupied rows, masks shifted so min_x is bit 0
+#   row_cells  ((dy, mask, xs), ...) the same with each row's occupied x offsets
+#   bottom     lowest occupied dy of each column min_x..max_x
+#   top        highest occupied dy of each column min_x..max_x
+#   spawn_x    x that centers this rotation in the grid
+#   max_left   largest x + min_x that stays inside the walls
+#   floor      largest y that stays above the floor
+#   land       y at which each column min_x..max_x rests on an empty column
+ShapeInfo = namedtuple("ShapeInfo", "cells min_x max_x min_y max_y width row_masks row_cells bottom top spawn_x "
+                                    "max_left floor land")
+
+
+def _shape_info(shape_matrix, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    # One pass over the cells, top row first: a column's first cell is its top.
+    cells = tuple((x, y) for y, row in enumerate(shape_matrix) for x, cell in enumerate(row) if cell)
+    row_xs = {}
+    tops = {}
+    bottoms = {}
+    for x, y in cells:
+        row_xs.setdefault(y, []).append(x)
+        tops.setdefault(x, y)
+        bottoms[x] = y
+    min_x, max_x = min(tops), max(tops)
+    min_y, max_y = cells[0][1], cells[-1][1]
+    row_cells = tuple((dy, sum(1 << (x - min_x) for x in xs), tuple(xs)) for dy, xs in row_xs.items())
+    columns = range(min_x, max_x + 1)
+    bottom = tuple(bottoms[col] for col in columns)
+    width = max_x - min_x + 1
+    return ShapeInfo(cells, min_x, max_x, min_y, max_y, width,
+                     tuple((dy, mask) for dy, mask, _ in row_cells), row_cells, bottom,
+                     tuple(tops[col] for col in columns), (grid_width - width) // 2 - min_x,
+                     grid_width - width, grid_height - 1 - max_y, tuple(grid_height - 1 - b for b in bottom))
+
+
+# (width, height) -> shape table, shared by every Rules with that board size.
+# Only the default size is built at import; others on first use.
+_shape_tables = {}
+
+
+def _shape_table(width, height):
+    table = _shape_tables.get((width, height))
+    if table is None:
+        table = _shape_tables[width, height] = tuple(
+            tuple(_shape_info(m, width, height) for m in rotations) for rotations in SHAPES)
+    return table
+
+
+class Rules:
+    """A rule set: board size, timing and scoring, plus the shape tables for
+    that board size (built on first use, once per size, and shared).
+
+    Boards, engines and bots read all of it from their rules, so variant
+    modes are a Rules value rather than an edit:
+
+        TetrisEngine(seed, rules=RULESETS["sprint"])
+        TetrisEngine(seed, rules=Rules("research", width=40, height=100))
+
+    Times are in seconds. An infinite initial_fall_speed turns gravity off
+    and an infinite lock_delay locks pieces only on hard drop. line_goal
+    ends the game once that many lines are cleared (0 = never). A Rules is
+    never changed after construction; replace() makes a modified copy.
+    Snapshots and replays store rules by name, so only the RULESETS entries
+    (at any board size) can be saved.
+    """
+
+    FIELDS = (
+        "name", "width", "height", "lock_delay", "initial_fall_speed", "level_speed_decrease",
+        "min_fall_speed", "lines_per_level", "score_per_line", "soft_drop_points", "hard_drop_points",
+        "garbage_per_line", "line_goal",
+    )
+    __slots__ = FIELDS + ("full_row", "empty_color_row", "color_row_bytes", "shapes")
+
+    def __init__(self, name="marathon", width=GRID_WIDTH, height=GRID_HEIGHT, lock_delay=LOCK_DELAY,
+                 initial_fall_speed=INITIAL_FALL_SPEED, level_speed_decrease=LEVEL_SPEED_DECREASE,
+                 min_fall_speed=MIN_FALL_SPEED, lines_per_level=LINES_PER_LEVEL,
+                 score_per_line=SCORE_PER_LINE, soft_drop_points=SOFT_DROP_POINTS,
+                 hard_drop_points=HARD_DROP_POINTS, garbage_per_line=GARBAGE_PER_LINE, line_goal=0):
+        if width < 4 or height < 4:
+            raise ValueError("a board must be at least 4x4, not %dx%d" % (width, height))
+        self.name = name
+        self.width = width
+        self.height = height
+        self.lock_delay = lock_delay
+        self.initial_fall_speed = initial_fall_speed
+        self.level_speed_decrease = level_speed_decrease
+        self.min_fall_speed = min_fall_speed
+        self.lines_per_level = lines_per_level
+        self.score_per_line = tuple(score_per_line)
+        self.soft_drop_points = soft_drop_points
+        self.hard_drop_points = hard_drop_points
+        self.garbage_per_line = tuple(garbage_per_line)
+        self.line_goal = line_goal
+        self.full_row = (1 << width) - 1
+        self.empty_color_row = bytes(width)
+        self.color_row_bytes = (width + 1) // 2
+        # shapes[shape_idx][rotation] -> ShapeInfo for this board; see __getattr__
+        table = _shape_tables.get((width, height))
+        if table is not None:
+            self.shapes = table
+
+    def __getattr__(self, name):
+        # Only reached while the shapes slot is unset: build it, after which
+        # it is a plain slot read.
+        if name != "shapes":
+            raise AttributeError(name)
+        self.shapes = _shape_table(self.width, self.height)
+        return self.shapes
+
+    def replace(self, **changes):
+        """A copy with the given fields changed."""
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values.update(changes)
+        return Rules(**values)
+
+    def __repr__(self):
+        return "Rules(%r, %dx%d)" % (self.name, self.width, self.height)
+
+
+_shape_table(GRID_WIDTH, GRID_HEIGHT)
+
+INFINITY = float("inf")
+
+# Named rule sets. Order matters: replays and snapshots store one as its
+# index here (plus the board size, in case it was changed).
+RULESETS = {
+    "marathon": Rules(),
+    "sprint": Rules("sprint", line_goal=40),
+    # Zero gravity: pieces only move when moved and lock on hard drop.
+    "zen": Rules("zen", initial_fall_speed=INFINITY, lock_delay=INFINITY),
+    "wide": Rules("wide", width=16),
+    # For stress tests and research rather than play.
+    "huge": Rules("huge", width=40, height=100),
+}
+RULESET_NAMES = tuple(RULESETS)
+DEFAULT_RULES = RULESETS["marathon"]
+
+
+def find_rules(index, width, height):
+    """The rule set stored as index in RULESET_NAMES, resized to width x height if need be."""
+    if index >= len(RULESET_NAMES):
+        raise ValueError("unknown rule set %d" % index)
+    rules = RULESETS[RULESET_NAMES[index]]
+    if (width, height) != (rules.width, rules.height):
+        rules = rules.replace(width=width, height=height)
+    return rules
+
+
+# SHAPE_TABLE[shape_idx][rotation] -> ShapeInfo for the default board; read-only,
+# shared by engine, bots and renderers. Other boards use their Rules.shapes.
+SHAPE_TABLE = DEFAULT_RULES.shapes
+
+
+def column_heights(rows, width=GRID_WIDTH):
+    """Height of each column's highest filled cell, from one top-down row scan."""
+    height = len(rows)
+    full = (1 << width) - 1
+    heights = [0] * width
+    seen = 0
+    for y, mask in enumerate(rows):
+        new = mask & ~seen
+        if new:
+            seen |= new
+            x = 0
+            while new:
+                if new & 1:
+                    heights[x] = height - y
+                new >>= 1
+                x += 1
+            if seen == full:
+                break
+    return heights
+
+
+class Board:
+    """The well as one int bitmask per row (bit x = column x), top row first.
+
+    Colors live in a separate plane of bytes rows holding shape_idx + 1
+    (0 = empty), so collision and line clears only touch the masks.
+
+    heights[x] is the height of column x's highest filled cell (0 = empty),
+    kept up to date on place() and clear_full_rows(). version increases on
+    every change so renderers can cache the stack.
+
+    rows, colors and heights are tuples that are replaced, never changed in
+    place, so copy() shares them and costs the same on any board; a lock
+    builds new tuples that reuse every untouched row. unchecked is the
+    (first, last) span of rows a lock filled up, the only rows
+    clear_full_rows() looks at. Code that edits rows directly assigns lists
+    and calls refresh().
+
+    The size comes from rules; shapes is rules.shapes, kept on the board
+    for the collision hot paths.
+    """
+
+    __slots__ = ("rows", "colors", "heights", "filled", "version", "rules", "shapes", "unchecked")
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = rules
+        self.shapes = rules.shapes
+        self.rows = (0,) * rules.height
+        self.colors = (rules.empty_color_row,) * rules.height
+        self.heights = (0,) * rules.width
+        self.filled = 0
+        self.version = 0
+        self.unchecked = (0, 0)
+
+    def fits(self, shape_idx, rotation, pos_x, pos_y):
+        """Check if the shape at (pos_x, pos_y) fits without collision."""
+        info = self.shapes[shape_idx][rotation & 3]
+        left = pos_x + info.min_x
+        if left < 0 or left > info.max_left or pos_y > info.floor:
+            return False
+        rows = self.rows
+        for dy, mask in info.row_masks:
+            y = pos_y + dy
+            if y >= 0 and rows[y] & (mask << left):
+                return False
+        return True
+
+    def drop_y(self, shape_idx, rotation, pos_x, pos_y):
+        """Return the Y position where the piece would land (hard drop position)."""
+        info = self.shapes[shape_idx][rotation & 3]
+        heights = self.heights
+        col = pos_x + info.min_x
+        land = info.floor
+        for column_land in info.land:
+            y = column_land - heights[col]
+            if y < land:
+                land = y
+            col += 1
+        if land >= pos_y:
+            return land
+        # The piece is tucked under an overhang: walk down from where it is.
+        while self.fits(shape_idx, rotation, pos_x, pos_y + 1):
+            pos_y += 1
+        return pos_y
+
+    def place(self, shape_idx, rotation, pos_x, pos_y):
+        """Lock the shape into the board. Cells above the top edge are dropped."""
+        info = self.shapes[shape_idx][rotation & 3]
+        left = pos_x + info.min_x
+        code = shape_idx + 1
+        full_row = self.rules.full_row
+        self.version += 1
+        rows = list(self.rows)
+        colors = list(self.colors)
+        full = False
+        for dy, mask, xs in info.row_cells:
+            y = pos_y + dy
+            if y >= 0:
+                old = rows[y]
+                bits = mask << left
+                rows[y] = old | bits
+                if rows[y] == full_row:
+                    full = True
+                row = bytearray(colors[y])
+                for x in xs:
+                    row[pos_x + x] = code
+                colors[y] = bytes(row)
+                # Only newly set cells count; a piece held into place may overlap.
+                self.filled += bin(bits & ~old).count("1") if old & bits else len(xs)
+        self.rows = tuple(rows)
+        self.colors = tuple(colors)
+        if full:
+            top = max(pos_y + info.min_y, 0)
+            end = pos_y + info.max_y + 1
+            first, last = self.unchecked
+            self.unchecked = (min(first, top), max(last, end)) if first < last else (top, end)
+        height = len(rows)
+        heights = list(self.heights)
+        col = left
+        for top, bottom in zip(info.top, info.bottom):
+            if pos_y + bottom >= 0:
+                h = min(height, height - pos_y - top)
+                if h > heights[col]:
+                    heights[col] = h
+            col += 1
+        self.heights = tuple(heights)
+
+    def clear_full_rows(self):
+        """Clear full rows and shift above rows down. Returns number of lines cleared.
+
+        Only the rows in unchecked can be full, so a lock that completes no
+        row costs nothing here.
+        """
+        first, last = self.unchecked
+        if first >= last:
+            return 0
+        self.unchecked = (0, 0)
+        rows = self.rows
+        rules = self.rules
+        full_row = rules.full_row
+        if full_row not in rows[first:last]:
+            return 0
+        keep = [y for y in range(first, last) if rows[y] != full_row]
+        cleared = last - first - len(keep)
+        colors = self.colors
+        self.rows = (0,) * cleared + rows[:first] + tuple([rows[y] for y in keep]) + rows[last:]
+        self.colors = ((rules.empty_color_row,) * cleared + colors[:first]
+                       + tuple([colors[y] for y in keep]) + colors[last:])
+        self.filled -= cleared * rules.width
+        self.version += 1
+        self._update_heights()
+        return cleared
+
+    def add_garbage(self, count, hole):
+        """Push the stack up count rows and fill the bottom with rows open at column hole.
+
+        Returns True if filled cells were pushed out over the top.
+        """
+        rules = self.rules
+        count = min(count, rules.height)
+        if count <= 0:
+            return False
+        rows = self.rows
+        pushed = rows[:count]
+        row = rules.full_row & ~(1 << hole)
+        codes = bytes(0 if x == hole else GARBAGE_CODE for x in range(rules.width))
+        self.rows = rows[count:] + (row,) * count
+        self.colors = self.colors[count:] + (codes,) * count
+        self.filled += (rules.width - 1) * count - sum(bin(mask).count("1") for mask in pushed)
+        self.version += 1
+        first, last = self.unchecked
+        if first < last:
+            self.unchecked = (max(first - count, 0), max(last - count, 0))
+        self._update_heights()
+        return any(pushed)
+
+    def _update_heights(self):
+        self.heights = tuple(column_heights(self.rows, self.rules.width))
+
+    def refresh(self):
+        """Recompute heights and the cell count after rows were assigned directly."""
+        self.rows = tuple(self.rows)
+        self.colors = tuple(bytes(c) for c in self.colors)
+        self.filled = sum(bin(mask).count("1") for mask in self.rows)
+        self.version += 1
+        self.unchecked = (0, len(self.rows))
+        self._update_heights()
+
+    def holes(self):
+        """Empty cells with a filled cell somewhere above them."""
+        return sum(self.heights) - self.filled
+
+    def bumpiness(self):
+        """Sum of height differences between neighbouring columns."""
+        h = self.heights
+        return sum(abs(h[x] - h[x + 1]) for x in range(len(h) - 1))
+
+    def max_height(self):
+        return max(self.heights)
+
+    def copy(self):
+        """An independent board sharing this one's (immutable) rows."""
+        board = Board.__new__(Board)
+        board.rows = self.rows
+        board.colors = self.colors
+        board.heights = self.heights
+        board.filled = self.filled
+        board.version = self.version
+        board.rules = self.rules
+        board.shapes = self.shapes
+        board.unchecked = self.unchecked
+        return board
+
+    def color_at(self, x, y):
+        """Return the color of the locked cell at (x, y), or None if empty."""
+        code = self.colors[y][x]
+        return CELL_COLORS[code - 1] if code else None
+
+
+# A final lock position: the piece state plus the shortest action path from
+# the start state, ending with HARD_DROP. cells are absolute (x, y) tuples.
+Placement = namedtuple("Placement", "shape_idx rotation x y cells path")
+
+
+def _rotation_classes(shape_idx):
+    """Map each rotation to the first rotation with the identical cell set."""
+    infos = SHAPE_TABLE[shape_idx]  # cells do not depend on the board size
+    return tuple(next(r for r in range(4) if infos[r].cells == infos[rot].cells) for rot in range(4))
+
+
+ROTATION_CLASS = tuple(_rotation_classes(s) for s in range(len(SHAPES)))
+
+PLACEMENT_CACHE_SIZE = 4096
+_placement_cache = OrderedDict()
+# Free-position masks are shifted up so a piece's left edge can step past the
+# wall (down to -3 after a rotation) without a negative shift.
+_FREE_SHIFT = 4
+
+
+def reachable_placements(board, shape_idx, pos_x=None, pos_y=0, rotation=0):
+    """Every distinct lock position the piece can reach from (pos_x, pos_y, rotation).
+
+    Breadth-first search over (x, y, rotation) states using the game's moves
+    (left, right, soft drop, clockwise rotate), so slides and tucks under
+    overhangs are found. Rotations with identical cells are merged, and
+    placements that cover the same cells (e.g. S/Z/I in opposite rotations)
+    are reported once, with the shortest path. Results are memoized per
+    (rules, board rows, piece, start state). pos_x defaults to the spawn
+    column.
+    """
+    infos = board.shapes[shape_idx]
+    if pos_x is None:
+        pos_x = infos[rotation & 3].spawn_x
+    key = (board.rules, tuple(board.rows), shape_idx, pos_x, pos_y, rotation & 3)
+    result = _placement_cache.get(key)
+    if result is not None:
+        _placement_cache.move_to_end(key)
+        return result
+
+    classes = ROTATION_CLASS[shape_idx]
+    rows = board.rows
+    height = len(rows)
+    # free[r][y - pos_y] has bit left + _FREE_SHIFT set where rotation r fits at
+    # (left - min_x, y): one shift per cell and row instead of a fits() per
+    # search state. Rows past the floor stay 0, which stops soft drops.
+    free = [None] * 4
+    shift = [0] * 4
+    # (shape of the cells, offset of their corner): equal keys cover equal cells
+    outline = [None] * 4
+    for r in set(classes):
+        info = infos[r]
+        outline[r] = (tuple(sorted((cx - info.min_x, cy - info.min_y) for cx, cy in info.cells)),
+                      info.min_x, info.min_y)
+        lefts = ((1 << (info.max_left + 1)) - 1) << _FREE_SHIFT
+        masks = []
+        for y in range(pos_y, height + 1):
+            if y > info.floor:
+                masks.append(0)
+                continue
+            blocked = 0
+            for dy, _, xs in info.row_cells:
+                ny = y + dy
+                if ny >= 0:
+                    row = rows[ny] << _FREE_SHIFT
+                    for cx in xs:
+                        blocked |= row >> (cx - info.min_x)
+            masks.append(lefts & ~blocked)
+        free[r] = masks
+        shift[r] = info.min_x + _FREE_SHIFT
+
+    x, y, r = start = (pos_x, pos_y, classes[rotation & 3])
+    result = []
+    if free[r][0] >> (x + shift[r]) & 1:
+        parent = {start: None}
+        frontier = [start]
+        seen_cells = set()
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                x, y, r = state
+                masks = free[r]
+                row = y - pos_y
+                bit = x + shift[r]
+                # Soft drop is expanded last so, among equally short paths, the
+                # one that moves and rotates before dropping is found first.
+                if masks[row] >> (bit - 1) & 1:
+                    nxt = (x - 1, y, r)
+                    if nxt not in parent:
+                        parent[nxt] = (state, LEFT)
+                        next_frontier.append(nxt)
+                if masks[row] >> (bit + 1) & 1:
+                    nxt = (x + 1, y, r)
+                    if nxt not in parent:
+                        parent[nxt] = (state, RIGHT)
+                        next_frontier.append(nxt)
+                turned = classes[(r + 1) & 3]
+                if free[turned][row] >> (x + shift[turned]) & 1:
+                    nxt = (x, y, turned)
+                    if nxt not in parent:
+                        parent[nxt] = (state, ROTATE)
+                        next_frontier.append(nxt)
+                if masks[row + 1] >> bit & 1:
+                    nxt = (x, y + 1, r)
+                    if nxt not in parent:
+                        parent[nxt] = (state, SOFT_DROP)
+                        next_frontier.append(nxt)
+                else:
+                    shape, dx, dy = outline[r]
+                    lock = (shape, x + dx, y + dy)
+                    if lock not in seen_cells:
+                        seen_cells.add(lock)
+                        cells = tuple(sorted((x + cx, y + cy) for cx, cy in infos[r].cells))
+                        result.append(Placement(shape_idx, r, x, y, cells, _path(parent, state)))
+            frontier = next_frontier
+    result = tuple(result)
+    _placement_cache[key] = result
+    if len(_placement_cache) > PLACEMENT_CACHE_SIZE:
+        _placement_cache.popitem(last=False)
+    return result
+
+
+def _path(parent, state):
+    """Actions from the search start to state; trailing soft drops become one hard drop."""
+    link = parent[state]
+    while link is not None and link[1] == SOFT_DROP:
+        link = parent[link[0]]
+    actions = [HARD_DROP]
+    while link is not None:
+        state, action = link
+        actions.append(action)
+        link = parent[state]
+    actions.reverse()
+    return tuple(actions)
+
+
+def fall_speed_for_level(level, rules=DEFAULT_RULES):
+    """Seconds per gravity row at the given level."""
+    return max(rules.min_fall_speed, rules.initial_fall_speed - (level - 1) * rules.level_speed_decrease)
+
+
+class FixedStep:
+    """Turns elapsed wall-clock time into a whole number of fixed ticks.
+
+    due() returns how many ticks have come due since the last call and keeps
+    the remainder, so the simulation advances at exactly rate ticks per
+    second however irregular the calls are. After a stall longer than
+    max_lag (a debugger, a dragged window) the backlog is dropped instead of
+    replayed in fast-forward. alpha is how far into the next tick we are.
+    """
+
+    def __init__(self, rate=TICK_RATE, max_lag=MAX_LAG, clock=time.perf_counter):
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.max_ticks = max(1, int(max_lag * rate))
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Start counting from now, discarding any backlog (e.g. after a pause)."""
+        self.last = self.clock()
+        self.accumulator = 0.0
+
+    def due(self):
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator * self.rate)
+        if ticks > self.max_ticks:
+            self.accumulator = 0.0
+            return self.max_ticks
+        self.accumulator -= ticks * self.period
+        return ticks
+
+    @property
+    def alpha(self):
+        return self.accumulator * self.rate
+
+    def delay(self):
+        """Seconds until the next tick is due (0 if it already is)."""
+        return max(0.0, self.period - self.accumulator - (self.clock() - self.last))
+
+    def wait(self):
+        """Sleep until the next tick is due."""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Everything but the board and the piece queue that makes up a game position.
+# The last two are versus garbage, which to_bytes() leaves out.
+STATE_FIELDS = (
+    "seed", "piece_index", "shape_idx", "rotation", "next_idx", "hold_idx", "can_hold",
+    "pos_x", "pos_y", "score", "level", "lines_cleared_total", "pieces_placed",
+    "fall_time", "fall_speed", "lock_timer", "elapsed", "game_over", "incoming", "garbage_out",
+)
+_get_state = attrgetter(*STATE_FIELDS)
+
+SNAPSHOT_MAGIC = b"TTSS"
+SNAPSHOT_VERSION = 3  # 1: before piece generators (always uniform); 2: before rule sets
+# rule set, width, height, generator, seed, piece index, shape, rotation,
+# next, hold (255 = none), can_hold, x, y, score, level, lines, pieces,
+# fall_time, fall_speed, lock_timer, elapsed, game_over
+_SNAPSHOT_HEAD = struct.Struct("<4sBBHHBQIBBBB?hhQHIIdddd?")
+# Version 2: the default board, no rule set or elapsed time, masks stored too.
+_SNAPSHOT_HEAD_V2 = struct.Struct("<4sBBQIBBBB?bbQHIIddd?")
+
+
+def rules_index(rules):
+    """The index find_rules() takes for rules; ValueError unless it is a
+    RULESETS entry, resized or not."""
+    preset = RULESETS.get(rules.name)
+    if preset is None or any(getattr(rules, name) != getattr(preset, name)
+                             for name in Rules.FIELDS if name not in ("width", "height")):
+        raise ValueError("%r is not one of the named rule sets (%s)" % (rules, ", ".join(RULESET_NAMES)))
+    return RULESET_NAMES.index(rules.name)
+
+
+COLOR_ROW_BYTES = (GRID_WIDTH + 1) // 2  # rules.color_row_bytes on other boards
+
+
+def pack_color_row(codes):
+    """A row of color codes as 4-bit pairs, low nibble first (color_row_bytes long)."""
+    width = len(codes)
+    codes += b"\0"  # pad an odd width
+    return bytes(codes[x] | codes[x + 1] << 4 for x in range(0, width, 2))
+
+
+def unpack_color_row(data, width=GRID_WIDTH):
+    """Inverse of pack_color_row()."""
+    row = bytearray()
+    for byte in data:
+        row += bytes((byte & 15, byte >> 4))
+    return bytes(row[:width])
+
+
+# Color code -> b"0" (empty) or b"1", to read a row mask off a color row.
+_MASK_DIGITS = b"0" + b"1" * 255
+
+
+def _unpack_colors(board, data, at):
+    """Fill board from packed color rows at data[at:], deriving the masks."""
+    rules = board.rules
+    width = rules.width
+    row_bytes = rules.color_row_bytes
+    rows = []
+    colors = []
+    for _ in range(rules.height):
+        codes = unpack_color_row(data[at:at + row_bytes], width)
+        at += row_bytes
+        rows.append(int(codes.translate(_MASK_DIGITS)[::-1], 2))
+        colors.append(codes)
+    board.rows = rows
+    board.colors = colors
+    board.refresh()
+
+
+class Snapshot:
+    """A frozen game position from TetrisEngine.snapshot().
+
+    Holds the board's immutable rows, the shared piece queue and a tuple of
+    the STATE_FIELDS, so taking and restoring one costs the same however far
+    the game has gone. to_bytes() packs it into under 200 bytes on the
+    default board: the rule set by name index and board size, the board as
+    4-bit colors (the masks follow from them), and the queue as its
+    generator, seed and position. Versus garbage (incoming, garbage_out) is
+    not serialized and comes back empty.
+    """
+
+    __slots__ = ("board", "queue", "state")
+
+    def __init__(self, board, queue, state):
+        self.board = board
+        self.queue = queue
+        self.state = state
+
+    def to_bytes(self):
+        """Raises ValueError if the game's rules are not a named rule set."""
+        (seed, index, shape, rotation, next_idx, hold, can_hold, x, y, score, level,
+         lines, pieces, fall_time, fall_speed, lock_timer, elapsed, over, _, _) = self.state
+        queue = self.queue
+        board = self.board
+        rules = board.rules
+        out = bytearray(_SNAPSHOT_HEAD.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, rules_index(rules), rules.width, rules.height,
+            GENERATOR_NAMES.index(queue.generator), queue.seed, index, shape, rotation, next_idx,
+            255 if hold is None else hold, can_hold, x, y, score, level, lines, pieces,
+            fall_time, fall_speed, lock_timer, elapsed, over))
+        for codes in board.colors:
+            out += pack_color_row(codes)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Inverse of to_bytes(), also reading version 2; raises ValueError on anything else."""
+        if data[4:5] == bytes((2,)):
+            return cls._from_v2(data)
+        head = _SNAPSHOT_HEAD.size
+        if len(data) < head:
+            raise ValueError("not a snapshot")
+        (magic, version, ruleset, width, height, generator, seed, index, shape, rotation, next_idx, hold,
+         can_hold, x, y, score, level, lines, pieces, fall_time, fall_speed, lock_timer, elapsed,
+         over) = _SNAPSHOT_HEAD.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or generator >= len(GENERATOR_NAMES):
+            raise ValueError("not a snapshot (or an unsupported version)")
+        rules = find_rules(ruleset, width, height)
+        if len(data) != head + rules.color_row_bytes * height:
+            raise ValueError("truncated snapshot of a %dx%d game" % (width, height))
+        board = Board(rules)
+        _unpack_colors(board, data, head)
+        state = (seed, index, shape, rotation, next_idx, None if hold == 255 else hold, can_hold,
+                 x, y, score, level, lines, pieces, fall_time, fall_speed, lock_timer, elapsed, over, (), 0)
+        return cls(board, PieceQueue(seed, GENERATOR_NAMES[generator]), state)
+
+    @classmethod
+    def _from_v2(cls, data):
+        head = _SNAPSHOT_HEAD_V2.size
+        if len(data) != head + 2 * GRID_HEIGHT + COLOR_ROW_BYTES * GRID_HEIGHT:
+            raise ValueError("not a snapshot of a %dx%d game" % (GRID_WIDTH, GRID_HEIGHT))
+        (magic, _, generator, seed, index, shape, rotation, next_idx, hold, can_hold, x, y, score,
+         level, lines, pieces, fall_time, fall_speed, lock_timer, over) = _SNAPSHOT_HEAD_V2.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or generator >= len(GENERATOR_NAMES):
+            raise ValueError("not a snapshot")
+        board = Board()
+        _unpack_colors(board, data, head + 2 * GRID_HEIGHT)
+        state = (seed, index, shape, rotation, next_idx, None if hold == 255 else hold, can_hold,
+                 x, y, score, level, lines, pieces, fall_time, fall_speed, lock_timer, 0.0, over, (), 0)
+        return cls(board, PieceQueue(seed, GENERATOR_NAMES[generator]), state)
+
+
+class TetrisEngine:
+    """One game of Tetris, advanced by step(action, dt).
+
+    step() returns the names of the sound events that happened ("move",
+    "rotate", "drop", "clear", "level", "gameover") so a front end can play
+    them; the engine itself never touches pygame.
+
+    For versus play, receive_garbage() queues lines from the opponent in
+    incoming; they rise from the bottom at the next lock that clears nothing,
+    and lines cleared first cancel them. Lines this game sends accumulate in
+    garbage_out for the caller to deliver and reset.
+
+    Board size, timing and scoring come from rules (see RULESETS). elapsed
+    counts the seconds stepped; with a line_goal the game ends, completed,
+    once that many lines are cleared.
+    """
+
+    def __init__(self, seed=None, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+        self.seed = seed
+        self.rules = rules
+        self.queue = PieceQueue(seed, generator)
+        self.piece_index = 0
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new game; with a seed, the piece sequence restarts from it."""
+        if seed is not None:
+            self.seed = seed
+            if seed != self.queue.seed:
+                self.queue = PieceQueue(seed, self.queue.generator)
+            self.piece_index = 0
+        self.board = Board(self.rules)
+        self.shape_idx = self._draw()
+        self.rotation = 0
+        self.next_idx = self._draw()
+        self.hold_idx = None
+        self.can_hold = True
+        self.pos_x = self.board.shapes[self.shape_idx][0].spawn_x
+        self.pos_y = 0
+        self.score = 0
+        self.level = 1
+        self.lines_cleared_total = 0
+        self.pieces_placed = 0
+        self.fall_time = 0
+        self.fall_speed = self.rules.initial_fall_speed
+        self.lock_timer = 0
+        self.elapsed = 0.0
+        self.game_over = False
+        self.incoming = ()  # ((lines, hole column), ...) oldest first
+        self.garbage_out = 0
+
+    def _draw(self):
+        shape = self.queue[self.piece_index]
+        self.piece_index += 1
+        return shape
+
+    @property
+    def generator(self):
+        return self.queue.generator
+
+    def preview(self, count):
+        """The next count pieces to spawn, next_idx first (hold aside)."""
+        return self.queue.peek(self.piece_index - 1, count)
+
+    def snapshot(self):
+        """The current position as a Snapshot, for undo, search branches or saving."""
+        return Snapshot(self.board.copy(), self.queue, _get_state(self))
+
+    def restore(self, snapshot):
+        """Return to a position from snapshot() (of this or any game)."""
+        self.board = snapshot.board.copy()
+        self.rules = self.board.rules
+        self.queue = snapshot.queue
+        for name, value in zip(STATE_FIELDS, snapshot.state):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        game = cls.__new__(cls)
+        game.restore(snapshot)
+        return game
+
+    @property
+    def completed(self):
+        """True once the rules' line_goal has been reached."""
+        return 0 < self.rules.line_goal <= self.lines_cleared_total
+
+    def receive_garbage(self, lines, hole):
+        """Queue lines of garbage, open at column hole, from the opponent."""
+        if lines > 0:
+            self.incoming += ((lines, hole),)
+
+    @property
+    def shape_info(self):
+        return self.board.shapes[self.shape_idx][self.rotation]
+
+    @property
+    def color(self):
+        return COLORS[self.shape_idx]
+
+    def fits(self, pos_x, pos_y, rotation=None):
+        """True if the current piece fits at (pos_x, pos_y) in the given rotation."""
+        if rotation is None:
+            rotation = self.rotation
+        return self.board.fits(self.shape_idx, rotation, pos_x, pos_y)
+
+    def ghost_y(self):
+        return self.board.drop_y(self.shape_idx, self.rotation, self.pos_x, self.pos_y)
+
+    def placements(self, shape_idx=None):
+        """Reachable lock positions for the current piece (or shape_idx from spawn)."""
+        if shape_idx is None:
+            return reachable_placements(self.board, self.shape_idx, self.pos_x, self.pos_y, self.rotation)
+        return reachable_placements(self.board, shape_idx)
+
+    def step(self, action=NONE, dt=0.0):
+        """Apply one action, then advance gravity and lock delay by dt seconds."""
+        events = []
+        if self.game_over:
+            return events
+        self.elapsed += dt
+        if action == HARD_DROP:
+            self._hard_drop(events)
+            return events
+        if action != NONE:
+            self._apply(action, events)
+        self._advance(dt, events)
+        return events
+
+    def tick(self, action=NONE):
+        """step() by one fixed TICK."""
+        return self.step(action, TICK)
+
+    def _apply(self, action, events):
+        if action == LEFT or action == RIGHT:
+            nx = self.pos_x + (1 if action == RIGHT else -1)
+            if self.fits(nx, self.pos_y):
+                self.pos_x = nx
+                self.lock_timer = 0
+                events.append("move")
+        elif action == SOFT_DROP:
+            if self.fits(self.pos_x, self.pos_y + 1):
+                self.pos_y += 1
+                self.score += self.rules.soft_drop_points
+                self.lock_timer = 0
+        elif action == ROTATE:
+            new_rot = (self.rotation + 1) % 4
+            if self.fits(self.pos_x, self.pos_y, new_rot):
+                self.rotation = new_rot
+                self.lock_timer = 0
+                events.append("rotate")
+        elif action == HOLD:
+            self._hold()
+
+    def _hold(self):
+        if not self.can_hold:
+            return
+        held = self.hold_idx
+        self.hold_idx = self.shape_idx
+        if held is None:
+            self.shape_idx = self.next_idx
+            self.next_idx = self._draw()
+        else:
+            self.shape_idx = held
+        self.rotation = 0
+        self.pos_x = self.board.shapes[self.shape_idx][0].spawn_x
+        self.pos_y = 0
+        self.can_hold = False
+
+    def _hard_drop(self, events):
+        events.append("drop")
+        gy = self.ghost_y()
+        self.score += self.rules.hard_drop_points * (gy - self.pos_y)
+        self.pos_y = gy
+        self.fall_time = 0
+        self._lock(events)
+
+    def _advance(self, dt, events):
+        # Gravity: one row per whole fall interval, so a long dt falls as far
+        # as the same time in short steps would.
+        self.fall_time += dt
+        while self.fall_time >= self.fall_speed:
+            self.fall_time -= self.fall_speed
+            if not self.fits(self.pos_x, self.pos_y + 1):
+                self.fall_time %= self.fall_speed
+                break
+            self.pos_y += 1
+            self.lock_timer = 0
+
+        # Lock delay: when piece has landed, wait lock_delay before locking (so you can slide)
+        if not self.fits(self.pos_x, self.pos_y + 1):
+            self.lock_timer += dt
+            if self.lock_timer >= self.rules.lock_delay:
+                self._lock(events)
+
+    def _lock(self, events):
+        """Write the current piece into the stack, clear lines and spawn the next piece."""
+        rules = self.rules
+        self.board.place(self.shape_idx, self.rotation, self.pos_x, self.pos_y)
+        self.pieces_placed += 1
+        lines = self.board.clear_full_rows()
+        if lines:
+            events.append("clear")
+            self._attack(rules.garbage_per_line[lines])
+        elif self.incoming:
+            for count, hole in self.incoming:
+                if self.board.add_garbage(count, hole):
+                    self.game_over = True
+            self.incoming = ()
+        self.score += rules.score_per_line[lines] * self.level
+        self.lines_cleared_total += lines
+        new_level = self.lines_cleared_total // rules.lines_per_level + 1
+        if new_level > self.level:
+            self.level = new_level
+            self.fall_speed = fall_speed_for_level(new_level, rules)
+            events.append("level")
+        if self.completed:
+            self.game_over = True
+        self._spawn(self.next_idx)
+        self.next_idx = self._draw()
+        if self.game_over or not self.fits(self.pos_x, 0):
+            self.game_over = True
+            events.append("gameover")
+
+    def _attack(self, lines):
+        """Cancel incoming garbage with lines sent; what is left goes to garbage_out."""
+        incoming = list(self.incoming)
+        while lines and incoming:
+            count, hole = incoming[0]
+            used = min(lines, count)
+            lines -= used
+            if used == count:
+                del incoming[0]
+            else:
+                incoming[0] = (count - used, hole)
+        self.incoming = tuple(incoming)
+        self.garbage_out += lines
+
+    def _spawn(self, shape_idx):
+        self.shape_idx = shape_idx
+        self.rotation = 0
+        self.pos_x = self.board.shapes[shape_idx][0].spawn_x
+        self.pos_y = 0
+        self.can_hold = True
+        self.lock_timer = 0
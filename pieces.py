@@ -0,0 +1,125 @@
+"""
+Piece generators (randomizers) and the seeded piece queue games draw from.
+No pygame.
+
+    queue = PieceQueue(seed=42, generator="bag")
+    queue[0], queue[1], ...          # the sequence, generated ahead in batches
+    queue.peek(10, 5)                # pieces 10..14
+
+Generators, by name in GENERATORS:
+
+- uniform: every piece independently random (the original rule; droughts
+  of any length are possible)
+- bag: the seven pieces in a shuffled bag, then the next bag, so a piece
+  never waits more than 12 others
+- history: TGM-style, rerolling up to HISTORY_TRIES times when the piece is
+  one of the last four dealt; the first piece is never S, Z or O
+
+A generator returns a whole batch per call and the queue keeps everything it
+produced, so lookahead of any depth is a list read and a seed always gives
+the same sequence.
+"""
+
+import random
+
+SHAPE_COUNT = 7  # I, O, T, S, Z, L, J as in engine.SHAPES
+I, O, T, S, Z, L, J = range(SHAPE_COUNT)
+
+UNIFORM_BATCH = 64
+BAG_BATCH = 9  # bags per batch
+HISTORY_BATCH = 64
+HISTORY_TRIES = 4
+
+
+class UniformGenerator:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def batch(self):
+        randint = self.rng.randint
+        return [randint(0, SHAPE_COUNT - 1) for _ in range(UNIFORM_BATCH)]
+
+
+class BagGenerator:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def batch(self):
+        sample = self.rng.sample
+        pieces = range(SHAPE_COUNT)
+        out = []
+        for _ in range(BAG_BATCH):
+            out += sample(pieces, SHAPE_COUNT)
+        return out
+
+
+class HistoryGenerator:
+    def __init__(self, rng):
+        self.rng = rng
+        self.history = [Z, S, Z, S]
+        self.first = True
+
+    def batch(self):
+        randrange = self.rng.randrange
+        history = self.history
+        out = []
+        if self.first:
+            self.first = False
+            piece = (I, T, L, J)[randrange(4)]
+            out.append(piece)
+            history.pop(0)
+            history.append(piece)
+        while len(out) < HISTORY_BATCH:
+            for _ in range(HISTORY_TRIES):
+                piece = randrange(SHAPE_COUNT)
+                if piece not in history:
+                    break
+            out.append(piece)
+            history.pop(0)
+            history.append(piece)
+        return out
+
+
+# Order matters: replays and snapshots store a generator as its index here.
+GENERATORS = {
+    "uniform": UniformGenerator,
+    "bag": BagGenerator,
+    "history": HistoryGenerator,
+}
+GENERATOR_NAMES = tuple(GENERATORS)
+DEFAULT_GENERATOR = "bag"
+
+
+class PieceQueue:
+    """A game's piece sequence, produced by a seeded generator and kept.
+
+    Pieces are only ever appended and a seed always yields the same
+    sequence, so games and snapshots share one queue and read it by index;
+    a branch that plays further ahead extends it exactly as any other would.
+    Without a seed one is picked at random.
+    """
+
+    __slots__ = ("seed", "generator", "source", "pieces")
+
+    def __init__(self, seed=None, generator=DEFAULT_GENERATOR):
+        if generator not in GENERATORS:
+            raise ValueError("unknown piece generator %r (choose from %s)"
+                             % (generator, ", ".join(GENERATOR_NAMES)))
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.seed = seed
+        self.generator = generator
+        self.source = GENERATORS[generator](random.Random(seed))
+        self.pieces = []
+
+    def __getitem__(self, i):
+        pieces = self.pieces
+        while i >= len(pieces):
+            pieces += self.source.batch()
+        return pieces[i]
+
+    def peek(self, start, count):
+        """Pieces start .. start + count - 1 as a list."""
+        if count > 0:
+            self[start + count - 1]
+        return self.pieces[start:start + count]
@@ -0,0 +1,118 @@
+"""
+Opt-in frame profiler: per-phase timings of the main loop with rolling
+percentiles and Chrome trace export. No pygame.
+
+    prof = Profiler()
+    start = prof.mark()
+    ...                          # the work being measured
+    prof.add("draw", start)
+    prof.end_frame()
+
+The game uses NULL_PROFILER unless profiling is switched on; its methods do
+nothing, so instrumented code costs a few attribute calls per frame.
+benchmarks/bench_profiler.py measures both.
+"""
+
+import json
+import os
+from collections import deque
+from time import perf_counter_ns
+
+WINDOW = 240  # frames kept for the rolling percentiles
+TRACE_LIMIT = 1000000  # trace events kept for export; older ones are dropped
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank q-th percentile of an ascending list; 0 when it is empty."""
+    if not sorted_values:
+        return 0
+    i = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class Profiler:
+    """Accumulates phase times per frame, in nanoseconds from perf_counter_ns.
+
+    add() may be called several times per phase in one frame (e.g. once per
+    simulation tick); the frame's total for the phase is what enters the
+    rolling window. Each add() is also kept as one trace event.
+    """
+
+    enabled = True
+
+    def __init__(self, window=WINDOW, trace_limit=TRACE_LIMIT):
+        self.window = window
+        self.phases = []
+        self.samples = {}
+        self.frame_times = deque(maxlen=window)
+        self.events = deque(maxlen=trace_limit)
+        self._frame = {}
+        self._frame_start = perf_counter_ns()
+        self._origin = self._frame_start
+
+    mark = staticmethod(perf_counter_ns)
+
+    def add(self, phase, start):
+        """Charge the time since start (a mark()) to phase."""
+        now = perf_counter_ns()
+        elapsed = now - start
+        self._frame[phase] = self._frame.get(phase, 0) + elapsed
+        self.events.append((phase, start, elapsed))
+
+    def end_frame(self):
+        now = perf_counter_ns()
+        self.frame_times.append(now - self._frame_start)
+        self._frame_start = now
+        samples = self.samples
+        for phase, elapsed in self._frame.items():
+            window = samples.get(phase)
+            if window is None:
+                window = samples[phase] = deque(maxlen=self.window)
+                self.phases.append(phase)
+            window.append(elapsed)
+        self._frame = {}
+
+    def stats(self):
+        """[(phase, p50_ms, p99_ms)] over the rolling window, loop period last.
+
+        Frames in which a phase did not run are not counted for it.
+        """
+        rows = []
+        for phase in self.phases:
+            values = sorted(self.samples[phase])
+            rows.append((phase, percentile(values, 50) / 1e6, percentile(values, 99) / 1e6))
+        values = sorted(self.frame_times)
+        rows.append(("loop", percentile(values, 50) / 1e6, percentile(values, 99) / 1e6))
+        return rows
+
+    def export_trace(self, path):
+        """Write the kept events as a Chrome trace (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        origin = self._origin
+        events = [{"name": phase, "ph": "X", "pid": pid, "tid": 0,
+                   "ts": (start - origin) / 1000.0, "dur": elapsed / 1000.0}
+                  for phase, start, elapsed in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class NullProfiler:
+    """Profiler stand-in for when profiling is off; every call is a no-op."""
+
+    enabled = False
+    phases = ()
+
+    def mark(self):
+        return 0
+
+    def add(self, phase, start):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def stats(self):
+        return []
+
+
+NULL_PROFILER = NullProfiler()
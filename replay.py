@@ -0,0 +1,301 @@
+"""
+Replays: a game recorded as its seed plus every step() input, and a player
+that re-simulates it through the engine rules.
+
+Games run at the engine's fixed TICK_RATE, so a game is its seed plus the
+input actions and how many ticks passed between them. A replay file starts
+with MAGIC, a version byte, the piece generator (its index in
+pieces.GENERATOR_NAMES), the rule set (its index in engine.RULESET_NAMES)
+with the board width and height as varints, and the seed as a varint,
+followed by one zlib
+stream of records. Each record is one byte: the ticks to run first in the
+high 5 bits and then an action in the low 3 (NONE for ticks alone); a run of
+TICKS_ESCAPE ticks or more stores TICKS_ESCAPE and the remainder as a varint.
+Action 7 marks the end of the game and is followed by the final score, lines
+and pieces as varints, so playback can check that it reproduced the game.
+
+The stream is append-only and sync-flushed every FLUSH_EVERY records, so a
+crash loses at most the last few seconds, and it is decoded chunk by chunk
+without reading the whole file. No pygame.
+
+    python replay.py replays/*.ttr             # verify as fast as possible
+    python replay.py --realtime game.ttr       # re-simulate at recorded speed
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+
+from engine import DEFAULT_RULES, NONE, TICK, TetrisEngine, find_rules, rules_index
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES
+
+MAGIC = b"TTRP"
+VERSION = 4
+# 1: per-frame dt in ms, before the fixed-tick simulation
+# 2: no generator byte; pieces were always uniform
+# 3: no rule set; always the default (marathon) rules
+READ_VERSIONS = (2, 3, 4)
+END = 7
+TICKS_ESCAPE = 31
+FLUSH_EVERY = 1024
+READ_SIZE = 4096
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replays")
+
+
+class ReplayError(Exception):
+    pass
+
+
+def put_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def get_varint(data):
+    """Read a varint from an iterator of bytes; None if the data ends first."""
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n
+        shift += 7
+    return None
+
+
+def new_seed():
+    return random.SystemRandom().getrandbits(63)
+
+
+class ReplayWriter:
+    """Records one game: step() and tick() drive the engine and log the input."""
+
+    def __init__(self, path, seed, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+        self.path = path
+        self.records = 0
+        self._ticks = 0
+        self._file = open(path, "wb")
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        header.append(GENERATOR_NAMES.index(generator))
+        header.append(rules_index(rules))
+        put_varint(header, rules.width)
+        put_varint(header, rules.height)
+        put_varint(header, seed)
+        self._file.write(header)
+        self._zip = zlib.compressobj(9)
+        self._buffer = bytearray()
+
+    def _record(self, action):
+        buf = self._buffer
+        ticks = self._ticks
+        if ticks < TICKS_ESCAPE:
+            buf.append(action | ticks << 3)
+        else:
+            buf.append(action | TICKS_ESCAPE << 3)
+            put_varint(buf, ticks - TICKS_ESCAPE)
+        self._ticks = 0
+        self.records += 1
+        if self.records % FLUSH_EVERY == 0:
+            self.flush()
+
+    def step(self, game, action):
+        """Apply an input action between ticks, recorded; returns the engine's events."""
+        if action == NONE:
+            return []
+        self._record(action)
+        return game.step(action, 0.0)
+
+    def tick(self, game):
+        """game.tick(), recorded; returns the engine's events."""
+        self._ticks += 1
+        return game.tick()
+
+    def end(self, game):
+        """Record the final result and close the file."""
+        if self._ticks:
+            self._record(NONE)
+        self._buffer.append(END)
+        for value in (game.score, game.lines_cleared_total, game.pieces_placed):
+            put_varint(self._buffer, value)
+        self.close()
+
+    def flush(self):
+        """Make everything recorded so far decodable from the file.
+
+        Ticks since the last input are left pending until the next record.
+        """
+        if self._file.closed:
+            return
+        self._file.write(self._zip.compress(self._buffer) + self._zip.flush(zlib.Z_SYNC_FLUSH))
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._ticks:
+            self._record(NONE)
+        self._file.write(self._zip.compress(self._buffer) + self._zip.flush())
+        self._file.close()
+        self._buffer.clear()
+
+
+class NullRecorder:
+    """ReplayWriter stand-in that drives the game without recording it."""
+
+    path = None
+
+    def step(self, game, action):
+        if action == NONE:
+            return []
+        return game.step(action, 0.0)
+
+    def tick(self, game):
+        return game.tick()
+
+    def end(self, game):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def start_recording(seed, directory=REPLAY_DIR, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+    """A ReplayWriter for a new game, named by start time and seed."""
+    os.makedirs(directory, exist_ok=True)
+    name = "%s-%d.ttr" % (time.strftime("%Y%m%d-%H%M%S"), seed)
+    return ReplayWriter(os.path.join(directory, name), seed, generator, rules)
+
+
+class Replay:
+    """A replay file opened for streaming.
+
+    seed, generator and rules are read from the header; records() decodes
+    (ticks, action) pairs one chunk at a time. result is the recorded
+    (score, lines, pieces) once steps() has reached the end marker, or None
+    for a game that was cut off.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.result = None
+        with open(path, "rb") as f:
+            head = f.read(len(MAGIC) + 1)
+            if len(head) < len(MAGIC) + 1 or head[:len(MAGIC)] != MAGIC:
+                raise ReplayError("%s: not a replay file" % path)
+            version = head[-1]
+            if version not in READ_VERSIONS:
+                raise ReplayError("%s: replay version %d, this game plays versions %s"
+                                  % (path, version, ", ".join(map(str, READ_VERSIONS))))
+            rest = f.read(16)
+        data = iter(rest)
+        self.generator = "uniform"
+        self.rules = DEFAULT_RULES
+        if version >= 3:
+            index = next(data, None)
+            if index is None or index >= len(GENERATOR_NAMES):
+                raise ReplayError("%s: unknown piece generator" % path)
+            self.generator = GENERATOR_NAMES[index]
+        if version >= 4:
+            index, width, height = next(data, None), get_varint(data), get_varint(data)
+            if height is None:
+                raise ReplayError("%s: truncated header" % path)
+            try:
+                self.rules = find_rules(index, width, height)
+            except ValueError as e:
+                raise ReplayError("%s: %s" % (path, e))
+        self.seed = get_varint(data)
+        if self.seed is None:
+            raise ReplayError("%s: truncated header" % path)
+        self._offset = len(head) + len(rest) - sum(1 for _ in data)
+
+    def _bytes(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            unzip = zlib.decompressobj()
+            for chunk in iter(lambda: f.read(READ_SIZE), b""):
+                try:
+                    yield from unzip.decompress(chunk)
+                except zlib.error:
+                    return
+            yield from unzip.flush()
+
+    def records(self):
+        data = self._bytes()
+        for byte in data:
+            action, ticks = byte & 7, byte >> 3
+            if action == END:
+                result = tuple(get_varint(data) for _ in range(3))
+                if None not in result:
+                    self.result = result
+                return
+            if ticks == TICKS_ESCAPE:
+                extra = get_varint(data)
+                if extra is None:
+                    return
+                ticks += extra
+            yield ticks, action
+
+
+def play(path, realtime=False):
+    """Re-simulate a replay; returns (game, replay).
+
+    With realtime the ticks are paced to TICK_RATE, otherwise they run as
+    fast as possible. Raises ReplayError if the game ends differently from
+    the recorded result.
+    """
+    replay = Replay(path)
+    game = TetrisEngine(replay.seed, replay.generator, replay.rules)
+    start = time.perf_counter()
+    elapsed = 0
+    for ticks, action in replay.records():
+        if realtime and ticks:
+            elapsed += ticks
+            delay = start + elapsed * TICK - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        for _ in range(ticks):
+            game.tick()
+        if action != NONE:
+            game.step(action, 0.0)
+    simulated = (game.score, game.lines_cleared_total, game.pieces_placed)
+    if replay.result is not None and replay.result != simulated:
+        raise ReplayError("%s: recorded score/lines/pieces %s, re-simulated %s"
+                          % (path, replay.result, simulated))
+    return game, replay
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate Tetris replays and check their results.")
+    parser.add_argument("paths", nargs="+", help="replay files")
+    parser.add_argument("--realtime", action="store_true", help="pace playback to the recorded timing")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for path in args.paths:
+        start = time.perf_counter()
+        try:
+            game, replay = play(path, args.realtime)
+        except (ReplayError, IOError) as e:
+            print("FAIL  %s" % e)
+            failed = True
+            continue
+        print("%s  %s  %s %s seed %d  score %d  lines %d  pieces %d  (%.2f s)"
+              % ("ok  " if replay.result else "open", path, replay.rules.name, replay.generator, replay.seed, game.score,
+                 game.lines_cleared_total, game.pieces_placed, time.perf_counter() - start))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
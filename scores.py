@@ -0,0 +1,342 @@
+"""
+Score store: finished games in an SQLite database (WAL mode), read back as
+top-N leaderboards per mode and per player. No pygame.
+
+    store = ScoreStore()
+    store.best("marathon")                       # for the sidebar
+    store.best_time("sprint")                    # fastest completed sprint
+    store.submit("ana", "marathon", game)        # returns at once
+    store.top("marathon", player="ana")          # [(player, score, lines, level, when, elapsed)]
+    store.close()                                # writes what is queued
+
+Modes with a line goal (TIMED_MODES, e.g. sprint) rank by time instead of
+score: the fastest completed games first, runs that topped out left off.
+
+submit() only puts the result on a queue; a background thread writes it, in
+batches of up to BATCH_SIZE games per transaction, so the game loop never
+waits on the disk. Every commit is atomic and WAL keeps readers working
+while another process writes, so several game instances can share one file.
+A database locked by another instance is retried up to BUSY_RETRIES times;
+a batch that still fails, or fails any other way, is reported on stderr and
+dropped. (WAL needs the instances on one host; SQLite warns against network
+filesystems.) open_store() falls back to NULL_STORE, which keeps nothing,
+when the database cannot be opened at all.
+
+The old highscore.txt, if present, is imported once as a score by LEGACY_PLAYER.
+
+    python scores.py                             # marathon top 10
+    python scores.py --player ana --mode sprint -n 20
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from engine import RULESETS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCORE_DB = os.path.join(HERE, "scores.db")
+LEGACY_FILE = os.path.join(HERE, "highscore.txt")
+LEGACY_PLAYER = "local"
+MODE = "marathon"
+TOP_N = 10
+BATCH_SIZE = 64
+BUSY_TIMEOUT = 5.0  # seconds SQLite waits on another writer before giving up
+RETRY_DELAY = 0.5
+# Ranked by ascending elapsed over completed games rather than by score.
+TIMED_MODES = frozenset(name for name, rules in RULESETS.items() if rules.line_goal)
+BUSY_RETRIES = 3  # further attempts at a locked batch (each waits BUSY_TIMEOUT) before it is dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 1,
+    pieces INTEGER NOT NULL DEFAULT 0,
+    seed INTEGER,
+    played_at REAL NOT NULL,
+    elapsed REAL NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scores_mode ON scores (mode, score DESC);
+CREATE INDEX IF NOT EXISTS scores_player ON scores (mode, player, score DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Columns added after the first release, for databases created before them.
+ADDED_COLUMNS = (
+    ("elapsed", "REAL NOT NULL DEFAULT 0"),
+    ("completed", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+TIME_INDEX = "CREATE INDEX IF NOT EXISTS scores_time ON scores (mode, completed, elapsed)"
+
+INSERT = ("INSERT INTO scores (player, mode, score, lines, level, pieces, seed, played_at, elapsed, completed)"
+          " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def connect(path=SCORE_DB):
+    db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+def _busy(error):
+    """True for the errors another instance's lock causes, which are worth retrying."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def _warn(message):
+    print("scores: " + message, file=sys.stderr)
+
+
+def _migrate(db):
+    """Add ADDED_COLUMNS missing from an older database, then the index that needs them."""
+    columns = {row[1] for row in db.execute("PRAGMA table_info(scores)")}
+    for name, spec in ADDED_COLUMNS:
+        if name not in columns:
+            try:
+                db.execute("ALTER TABLE scores ADD COLUMN %s %s" % (name, spec))
+            except sqlite3.OperationalError as error:
+                # Another instance added it first.
+                if "duplicate column" not in str(error):
+                    raise
+    db.execute(TIME_INDEX)
+
+
+def default_player():
+    for name in ("TETRIS_PLAYER", "USER", "USERNAME"):
+        if os.environ.get(name):
+            return os.environ[name]
+    return LEGACY_PLAYER
+
+
+class ScoreStore:
+    """Leaderboard queries on the calling thread; writes on a background thread.
+
+    The writer starts with the first submit(), so a store that only reads
+    (e.g. while watching a replay) runs no thread.
+    """
+
+    def __init__(self, path=SCORE_DB, batch_size=BATCH_SIZE, legacy=LEGACY_FILE):
+        self.path = path
+        self.batch_size = batch_size
+        self.db = connect(path)
+        self.queue = queue.Queue()
+        self.writer = None
+        self.errors = 0
+        try:
+            self.db.executescript(SCHEMA)
+            _migrate(self.db)
+            if legacy:
+                self._import_legacy(legacy)
+        except sqlite3.Error:
+            self.db.close()
+            raise
+
+    def _import_legacy(self, path):
+        """Record highscore.txt once; the meta row keeps other instances from repeating it."""
+        try:
+            with open(path) as f:
+                score = int(f.read().strip())
+        except (ValueError, IOError):
+            return
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone() is None:
+                db.execute(INSERT, (LEGACY_PLAYER, MODE, score, 0, 1, 0, None, os.path.getmtime(path), 0.0, 0))
+                db.execute("INSERT INTO meta VALUES ('legacy_imported', ?)", (path,))
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+    def submit(self, player, mode, game):
+        """Queue a finished game (a TetrisEngine or anything with its result fields)."""
+        self.queue.put((player, mode, game.score, game.lines_cleared_total, game.level,
+                        game.pieces_placed, getattr(game, "seed", None), time.time(),
+                        getattr(game, "elapsed", 0.0), int(getattr(game, "completed", False))))
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write, name="scores", daemon=True)
+            self.writer.start()
+
+    def _write(self):
+        try:
+            db = connect(self.path)
+        except sqlite3.Error as error:
+            _warn("cannot open %s, scores are not saved: %s" % (self.path, error))
+            db = None
+        done = False
+        while not done:
+            pending = []
+            item = self.queue.get()
+            try:
+                while item is not None:
+                    pending.append(item)
+                    if len(pending) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                done = item is None
+                if pending and db is not None:
+                    self._insert(db, pending)
+            finally:
+                # One per get(), the closing None included, so flush() never hangs.
+                for _ in range(len(pending) + done):
+                    self.queue.task_done()
+        if db is not None:
+            db.close()
+
+    def _insert(self, db, batch):
+        """Write batch in one transaction, retrying while another instance holds the lock."""
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    db.executemany(INSERT, batch)
+                    db.execute("COMMIT")
+                except sqlite3.Error:
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    raise
+                return
+            except sqlite3.Error as error:
+                self.errors += 1
+                if attempt == BUSY_RETRIES or not _busy(error):
+                    _warn("dropped %d game(s): %s" % (len(batch), error))
+                    return
+                time.sleep(RETRY_DELAY)
+
+    def flush(self):
+        """Block until every submitted game is written."""
+        if self.writer is not None:
+            self.queue.join()
+
+    def close(self):
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        self.db.close()
+
+    def best(self, mode=MODE, player=None):
+        """Highest score in mode (for one player if given); 0 when there is none."""
+        if player is None:
+            row = self.db.execute("SELECT MAX(score) FROM scores WHERE mode = ?", (mode,)).fetchone()
+        else:
+            row = self.db.execute("SELECT MAX(score) FROM scores WHERE mode = ? AND player = ?",
+                                  (mode, player)).fetchone()
+        return row[0] or 0
+
+    def best_time(self, mode, player=None):
+        """Fewest seconds to complete mode (for one player if given); None when nobody has."""
+        if player is None:
+            row = self.db.execute("SELECT MIN(elapsed) FROM scores WHERE mode = ? AND completed",
+                                  (mode,)).fetchone()
+        else:
+            row = self.db.execute("SELECT MIN(elapsed) FROM scores WHERE mode = ? AND completed AND player = ?",
+                                  (mode, player)).fetchone()
+        return row[0]
+
+    def top(self, mode=MODE, player=None, n=TOP_N):
+        """[(player, score, lines, level, played_at, elapsed)], best first.
+
+        Timed modes list completed games only, fastest first.
+        """
+        if mode in TIMED_MODES:
+            where, order = "mode = ? AND completed", "elapsed"
+        else:
+            where, order = "mode = ?", "score DESC"
+        params = (mode,)
+        if player is not None:
+            where += " AND player = ?"
+            params += (player,)
+        return self.db.execute(
+            "SELECT player, score, lines, level, played_at, elapsed FROM scores"
+            " WHERE %s ORDER BY %s LIMIT ?" % (where, order), params + (n,)).fetchall()
+
+    def players(self, mode=MODE, n=TOP_N):
+        """[(player, best)] for the n best players in mode: best score, or best time in timed modes."""
+        if mode in TIMED_MODES:
+            return self.db.execute(
+                "SELECT player, MIN(elapsed) AS best FROM scores WHERE mode = ? AND completed"
+                " GROUP BY player ORDER BY best LIMIT ?", (mode, n)).fetchall()
+        return self.db.execute(
+            "SELECT player, MAX(score) AS best FROM scores WHERE mode = ?"
+            " GROUP BY player ORDER BY best DESC LIMIT ?", (mode, n)).fetchall()
+
+
+class NullStore:
+    """ScoreStore stand-in for when the database cannot be opened: keeps nothing."""
+
+    def submit(self, player, mode, game):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def best(self, mode=MODE, player=None):
+        return 0
+
+    def best_time(self, mode, player=None):
+        return None
+
+    def top(self, mode=MODE, player=None, n=TOP_N):
+        return []
+
+    def players(self, mode=MODE, n=TOP_N):
+        return []
+
+
+NULL_STORE = NullStore()
+
+
+def open_store(path=SCORE_DB):
+    """A ScoreStore on path, or NULL_STORE (with a warning) if it cannot be opened."""
+    try:
+        return ScoreStore(path)
+    except sqlite3.Error as error:
+        _warn("cannot open %s, scores are not saved: %s" % (path, error))
+        return NULL_STORE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show Tetris leaderboards.")
+    parser.add_argument("--mode", default=MODE, help="game mode (default %(default)s)")
+    parser.add_argument("--player", help="only this player's games")
+    parser.add_argument("--players", action="store_true", help="best score (or time) per player instead of best games")
+    parser.add_argument("-n", type=int, default=TOP_N, help="rows (default %(default)d)")
+    parser.add_argument("--db", default=SCORE_DB, help="database file")
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.db)
+    timed = args.mode in TIMED_MODES
+    if args.players:
+        for rank, (player, best) in enumerate(store.players(args.mode, args.n), 1):
+            print("%3d  %-16s %9.2f s" % (rank, player, best) if timed else "%3d  %-16s %9d" % (rank, player, best))
+    else:
+        for rank, (player, score, lines, level, when, elapsed) in enumerate(
+                store.top(args.mode, args.player, args.n), 1):
+            result = "%9.2f s" % elapsed if timed else "%9d" % score
+            print("%3d  %-16s %s  %4d lines  level %2d  %s"
+                  % (rank, player, result, lines, level, time.strftime("%Y-%m-%d %H:%M", time.localtime(when))))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
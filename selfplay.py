@@ -0,0 +1,202 @@
+"""
+Self-play runner: play many headless games across a process pool.
+
+Every game gets its own seed derived from --seed and the game index, and its
+own policy instance, so results are reproducible and workers share nothing.
+Per-game results stream out as JSON lines as soon as each game finishes; an
+aggregate summary (throughput, score distribution) is written at the end.
+
+    python selfplay.py --games 1000 --policy greedy --policy ai --out games.jsonl
+    python selfplay.py --games 100 --policy ai --mode huge
+
+A policy is a name from POLICIES or "module:factory", where factory(seed)
+returns a callable mapping a TetrisEngine to an action.
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from engine import (
+    ACTIONS, HARD_DROP, LEFT, RIGHT, ROTATE, RULESETS, RULESET_NAMES,
+    TetrisEngine,
+)
+from ai import AutoPlayer
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES
+from profiler import percentile
+
+
+class RandomPolicy:
+    """Uniformly random actions."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def __call__(self, game):
+        return self.rng.choice(ACTIONS)
+
+
+class GreedyPolicy:
+    """Rotate and shift toward the flattest landing spot, then hard drop."""
+
+    def __init__(self, seed=None):
+        pass
+
+    def __call__(self, game):
+        best = None
+        for rotation in range(4):
+            for x in range(-3, game.rules.width):
+                if not game.board.fits(game.shape_idx, rotation, x, 0):
+                    continue
+                board = game.board.copy()
+                board.place(game.shape_idx, rotation, x, board.drop_y(game.shape_idx, rotation, x, 0))
+                lines = board.clear_full_rows()
+                cost = sum(board.heights) + 4 * board.holes() + board.bumpiness() - 10 * lines
+                if best is None or cost < best[0]:
+                    best = (cost, rotation, x)
+        if best is None:
+            return HARD_DROP
+        _, rotation, x = best
+        if rotation != game.rotation:
+            return ROTATE
+        if x != game.pos_x:
+            return LEFT if x < game.pos_x else RIGHT
+        return HARD_DROP
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+    "ai": AutoPlayer,
+}
+
+
+def load_policy(name):
+    """Return the policy factory for a POLICIES name or a "module:factory" path."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError("unknown policy %r (expected one of %s or module:factory)"
+                         % (name, ", ".join(sorted(POLICIES))))
+    return getattr(importlib.import_module(module), attr)
+
+
+def game_seed(base_seed, index):
+    """Deterministic, well-spread seed for game number index."""
+    return random.Random("%d:%d" % (base_seed, index)).getrandbits(63)
+
+
+def play_game(task):
+    """Play one game to the end (or max_pieces); runs inside a worker process."""
+    policy_name, index, seed, dt, max_pieces, generator, mode = task
+    policy = load_policy(policy_name)(seed ^ 0x5EED)
+    game = TetrisEngine(seed, generator, RULESETS[mode])
+    steps = 0
+    start = time.perf_counter()
+    while not game.game_over and (not max_pieces or game.pieces_placed < max_pieces):
+        game.step(policy(game), dt)
+        steps += 1
+    return {
+        "policy": policy_name,
+        "game": index,
+        "seed": seed,
+        "generator": generator,
+        "mode": mode,
+        "score": game.score,
+        "lines": game.lines_cleared_total,
+        "level": game.level,
+        "pieces": game.pieces_placed,
+        "steps": steps,
+        "game_seconds": game.elapsed,
+        "topped_out": game.game_over and not game.completed,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def summarize(results, wall_seconds, workers):
+    """Aggregate per-policy score distributions and overall throughput."""
+    summary = {
+        "games": len(results),
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "games_per_second": len(results) / wall_seconds if wall_seconds else 0.0,
+        "pieces_per_second": sum(r["pieces"] for r in results) / wall_seconds if wall_seconds else 0.0,
+        "steps_per_second": sum(r["steps"] for r in results) / wall_seconds if wall_seconds else 0.0,
+        "policies": {},
+    }
+    for name in sorted(set(r["policy"] for r in results)):
+        mine = [r for r in results if r["policy"] == name]
+        scores = sorted(r["score"] for r in mine)
+        summary["policies"][name] = {
+            "games": len(mine),
+            "score_mean": sum(scores) / len(scores),
+            "score_min": scores[0],
+            "score_p10": percentile(scores, 10),
+            "score_p50": percentile(scores, 50),
+            "score_p90": percentile(scores, 90),
+            "score_max": scores[-1],
+            "lines_mean": sum(r["lines"] for r in mine) / len(mine),
+            "level_max": max(r["level"] for r in mine),
+            "pieces_mean": sum(r["pieces"] for r in mine) / len(mine),
+        }
+    return summary
+
+
+def run(policies, games, seed=0, workers=None, dt=1 / 60.0, max_pieces=0, out=None,
+        generator=DEFAULT_GENERATOR, mode="marathon"):
+    """Play games for every policy (same seeds for each) and return the summary.
+
+    Each finished game is written to out as one JSON line.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(name, i, game_seed(seed, i), dt, max_pieces, generator, mode)
+             for i in range(games) for name in policies]
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            results.append(result)
+            if out is not None:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    return summarize(results, time.perf_counter() - start, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Tetris games across a process pool.")
+    parser.add_argument("--games", type=int, default=100, help="games per policy")
+    parser.add_argument("--policy", action="append", help="policy name or module:factory (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; game seeds derive from it")
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    parser.add_argument("--dt", type=float, default=1 / 60.0, help="seconds per step")
+    parser.add_argument("--max-pieces", type=int, default=0, help="stop each game after this many pieces")
+    parser.add_argument("--generator", choices=GENERATOR_NAMES, default=DEFAULT_GENERATOR,
+                        help="piece randomizer (default %(default)s)")
+    parser.add_argument("--mode", choices=RULESET_NAMES, default="marathon",
+                        help="rule set: board size, timing and scoring (default %(default)s)")
+    parser.add_argument("--out", help="per-game JSON lines (default: stdout)")
+    parser.add_argument("--summary", help="write the aggregate summary JSON here")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        summary = run(args.policy or ["random"], args.games, args.seed, args.workers,
+                      args.dt, args.max_pieces, out, args.generator, args.mode)
+    finally:
+        if args.out:
+            out.close()
+    text = json.dumps(summary, indent=2)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            f.write(text + "\n")
+    print(text, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Procedural sound synthesis: sine tones, chords and envelopes as 16-bit mono PCM.
+
+Samples are generated in bulk: with NumPy when it is installed, otherwise from
+one cached period per frequency that is tiled to length. Neither path runs a
+Python statement per sample. Generated buffers are cached on disk, keyed by
+every parameter that affects the output. No pygame.
+"""
+
+import array
+import hashlib
+import math
+import operator
+import os
+from functools import lru_cache
+from itertools import chain, repeat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 22050
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".soundcache")
+
+
+def _as_freqs(freq):
+    return tuple(freq) if isinstance(freq, (tuple, list)) else (freq,)
+
+
+@lru_cache(maxsize=64)
+def _period(freq, sample_rate):
+    """One full period of sin(2*pi*freq*i/sample_rate), exact for integer freq."""
+    if freq == int(freq):
+        length = sample_rate // math.gcd(int(freq), sample_rate)
+    else:
+        length = sample_rate
+    step = 2 * math.pi * freq / sample_rate
+    return array.array("d", map(math.sin, map(step.__mul__, range(length))))
+
+
+def _envelope_gains(n, envelope, sample_rate):
+    """Per-sample gain iterator for an (attack_ms, release_ms) linear envelope."""
+    attack_ms, release_ms = envelope
+    a = min(n, int(sample_rate * attack_ms / 1000.0))
+    r = min(n - a, int(sample_rate * release_ms / 1000.0))
+    return chain(map((1.0 / a if a else 0.0).__mul__, range(a)),
+                 repeat(1.0, n - a - r),
+                 map((1.0 / r if r else 0.0).__mul__, range(r, 0, -1)))
+
+
+def _synth_table(freqs, n, volume, envelope, sample_rate):
+    parts = []
+    for f in freqs:
+        period = _period(f, sample_rate)
+        reps = n // len(period) + 1
+        parts.append((period * reps)[:n])
+    samples = parts[0] if len(parts) == 1 else map(sum, zip(*parts))
+    if envelope:
+        samples = map(operator.mul, samples, _envelope_gains(n, envelope, sample_rate))
+    scale = 32767 * volume / len(freqs)
+    return array.array("h", map(int, map(scale.__mul__, samples))).tobytes()
+
+
+def _synth_numpy(freqs, n, volume, envelope, sample_rate):
+    t = np.arange(n, dtype=np.float64) * (2 * np.pi / sample_rate)
+    wave = np.sin(t * freqs[0])
+    for f in freqs[1:]:
+        wave += np.sin(t * f)
+    if envelope:
+        attack_ms, release_ms = envelope
+        a = min(n, int(sample_rate * attack_ms / 1000.0))
+        r = min(n - a, int(sample_rate * release_ms / 1000.0))
+        if a:
+            wave[:a] *= np.arange(a) / a
+        if r:
+            wave[n - r:] *= np.arange(r, 0, -1) / r
+    wave *= 32767 * volume / len(freqs)
+    return np.clip(wave, -32768, 32767).astype("<i2").tobytes()
+
+
+def tone(freq, duration_ms, volume=0.15, envelope=None, sample_rate=SAMPLE_RATE, use_numpy=True):
+    """Return 16-bit mono PCM bytes for a tone or chord.
+
+    freq is a frequency in Hz or a sequence of them (a chord, mixed at equal
+    level); envelope is an optional (attack_ms, release_ms) linear fade.
+    """
+    freqs = _as_freqs(freq)
+    n = int(sample_rate * duration_ms / 1000.0)
+    if n <= 0:
+        return b""
+    if np is not None and use_numpy:
+        return _synth_numpy(freqs, n, volume, envelope, sample_rate)
+    return _synth_table(freqs, n, volume, envelope, sample_rate)
+
+
+def cache_path(freq, duration_ms, volume=0.15, envelope=None, sample_rate=SAMPLE_RATE):
+    key = repr((_as_freqs(freq), duration_ms, volume, envelope and tuple(envelope), sample_rate))
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".pcm")
+
+
+def cached_tone(freq, duration_ms, volume=0.15, envelope=None, sample_rate=SAMPLE_RATE):
+    """tone(), read from the on-disk cache when present and written to it otherwise."""
+    path = cache_path(freq, duration_ms, volume, envelope, sample_rate)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except IOError:
+        pass
+    pcm = tone(freq, duration_ms, volume, envelope, sample_rate)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = path + ".%d.tmp" % os.getpid()
+        with open(tmp, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, path)
+    except (IOError, OSError):
+        pass
+    return pcm
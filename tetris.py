@@ -3,20 +3,27 @@ Minimal Tetris: clean GUI, sounds, lock delay.
 """
 
 import pygame
-import random
+import argparse
 import os
-import math
-import array
-
-# Initialize pygame (mixer before display for sound)
-pygame.mixer.pre_init(22050, -16, 1, 512)
-pygame.init()
-
-# Screen
+import time
+from collections import OrderedDict, deque
+
+from engine import (
+    CELL_COLORS, COLORS, GRID_WIDTH, GRID_HEIGHT, RULESETS, RULESET_NAMES,
+    NONE, LEFT, RIGHT, SOFT_DROP, ROTATE, HARD_DROP, HOLD,
+    SHAPES, SHAPE_TABLE, FixedStep, Snapshot, TetrisEngine,
+)
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES
+from controls import ARR, DAS, Controls
+from profiler import NULL_PROFILER, Profiler
+
+# Screen (for the default board; set_board() lays out others)
 SCREEN_WIDTH = 380
 SCREEN_HEIGHT = 600
 BLOCK_SIZE = 26
+MAX_PLAY_W = 1000  # pixels a wide board may take; blocks shrink to fit
 PREVIEW_SIZE = 12
+QUEUE_SIZE = 8  # block size of the pieces after next
 MARGIN = 8
 
 # Minimal palette
@@ -29,92 +36,77 @@ TEXT_MUTED = (120, 120, 132)
 ACCENT = (72, 72, 92)
 GHOST_ALPHA = 90
 
-# Tetromino colors (I, O, T, S, Z, L, J)
-COLORS = [
-    (0, 220, 240), (240, 220, 60), (180, 90, 240),
-    (60, 200, 100), (220, 70, 70), (240, 160, 50), (60, 110, 240),
-]
-
-# Shapes: each is a list of 4 rotation states (0°, 90°, 180°, 270°)
-# I, O, T, S, Z, L, J
-SHAPES = [
-    [[[0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0], [0, 0, 0, 0]],
-     [[0, 0, 1, 0], [0, 0, 1, 0], [0, 0, 1, 0], [0, 0, 1, 0]],
-     [[0, 0, 0, 0], [0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0]],
-     [[0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0]]],
-    [[[1, 1], [1, 1]], [[1, 1], [1, 1]], [[1, 1], [1, 1]], [[1, 1], [1, 1]]],
-    [[[0, 1, 0], [1, 1, 1], [0, 0, 0]],
-     [[0, 1, 0], [0, 1, 1], [0, 1, 0]],
-     [[0, 0, 0], [1, 1, 1], [0, 1, 0]],
-     [[0, 1, 0], [1, 1, 0], [0, 1, 0]]],
-    [[[0, 1, 1], [1, 1, 0], [0, 0, 0]],
-     [[0, 1, 0], [0, 1, 1], [0, 0, 1]],
-     [[0, 0, 0], [0, 1, 1], [1, 1, 0]],
-     [[1, 0, 0], [1, 1, 0], [0, 1, 0]]],
-    [[[1, 1, 0], [0, 1, 1], [0, 0, 0]],
-     [[0, 0, 1], [0, 1, 1], [0, 1, 0]],
-     [[0, 0, 0], [1, 1, 0], [0, 1, 1]],
-     [[0, 1, 0], [1, 1, 0], [1, 0, 0]]],
-    [[[1, 1, 1], [1, 0, 0], [0, 0, 0]],
-     [[0, 1, 1], [0, 1, 0], [0, 1, 0]],
-     [[0, 0, 0], [0, 0, 1], [1, 1, 1]],
-     [[0, 1, 0], [0, 1, 0], [0, 1, 1]]],
-    [[[1, 1, 1], [0, 0, 1], [0, 0, 0]],
-     [[0, 1, 0], [0, 1, 0], [0, 1, 1]],
-     [[0, 0, 0], [1, 0, 0], [1, 1, 1]],
-     [[0, 1, 1], [0, 1, 0], [0, 1, 0]]],
-]
+# Redraws per second; the game logic runs at engine.TICK_RATE
+FRAME_RATE = 60
+
+# Upcoming pieces shown in the sidebar: next, then the rest in two columns
+PREVIEW_COUNT = 5
+
+# Lines in the sidebar profile readout (header, phases, frame period)
+PROFILE_ROWS = 9
+
+# Practice mode: pieces that can be taken back, and where a game is suspended on quit
+UNDO_DEPTH = 100
+SUSPEND_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "practice.tts")
 
 # Grid
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
+BOARD_WIDTH = GRID_WIDTH
+BOARD_HEIGHT = GRID_HEIGHT
 PLAY_W = GRID_WIDTH * BLOCK_SIZE
 PLAY_H = GRID_HEIGHT * BLOCK_SIZE
 SIDEBAR_W = SCREEN_WIDTH - PLAY_W - MARGIN * 2
 SIDEBAR_X = PLAY_W + MARGIN
+MAX_BLOCK_SIZE = BLOCK_SIZE
 
-# Scoring
-SCORE_PER_LINE = (0, 100, 300, 500, 800)
-SOFT_DROP_POINTS = 1
-HARD_DROP_POINTS = 2
 
-# Level & timing
-INITIAL_FALL_SPEED = 0.72
-LEVEL_SPEED_DECREASE = 0.065
-MIN_FALL_SPEED = 0.06
-LINES_PER_LEVEL = 10
-LOCK_DELAY = 0.5  # seconds to move/rotate after landing before lock
+def set_board(width, height):
+    """Lay the window out for a width x height board; call before init().
 
-HIGH_SCORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "highscore.txt")
+    Blocks keep their default size where the board fits the default play
+    area's height (and MAX_PLAY_W) and shrink where it does not; the
+    sidebar keeps its width.
+    """
+    global BOARD_WIDTH, BOARD_HEIGHT, BLOCK_SIZE, PLAY_W, PLAY_H, SCREEN_WIDTH, SIDEBAR_X
+    BOARD_WIDTH, BOARD_HEIGHT = width, height
+    BLOCK_SIZE = max(2, min(MAX_BLOCK_SIZE, GRID_HEIGHT * MAX_BLOCK_SIZE // height, MAX_PLAY_W // width))
+    PLAY_W = width * BLOCK_SIZE
+    PLAY_H = height * BLOCK_SIZE
+    SIDEBAR_X = PLAY_W + MARGIN
+    SCREEN_WIDTH = PLAY_W + MARGIN * 2 + SIDEBAR_W
 
-# Sound (generated beeps)
+# Sound (generated beeps): name -> (freq or chord, duration_ms, volume, envelope)
 SAMPLE_RATE = 22050
-_sounds = {}
+SOUND_BANK = {
+    "move": (180, 35, 0.15, None),
+    "rotate": (280, 45, 0.15, None),
+    "drop": (120, 25, 0.15, None),
+    "clear": (400, 80, 0.15, None),
+    "level": (520, 60, 0.15, None),
+    "gameover": (200, 300, 0.15, None),
+}
+_sounds = None  # loaded on first play()
+
 
+def _beep(freq, duration_ms, volume=0.15, envelope=None):
+    import synth  # imported on first sound, off the startup path
 
-def _beep(freq, duration_ms, volume=0.15):
-    n = int(SAMPLE_RATE * duration_ms / 1000.0)
-    buf = array.array("h")
-    for i in range(n):
-        val = int(32767 * volume * math.sin(2 * math.pi * freq * i / SAMPLE_RATE))
-        buf.append(max(-32768, min(32767, val)))
-    return pygame.mixer.Sound(buffer=buf)
+    return pygame.mixer.Sound(buffer=synth.cached_tone(freq, duration_ms, volume, envelope, SAMPLE_RATE))
 
 
 def init_sounds():
+    global _sounds
+    _sounds = {}
     try:
         pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1, buffer=512)
-        _sounds["move"] = _beep(180, 35)
-        _sounds["rotate"] = _beep(280, 45)
-        _sounds["drop"] = _beep(120, 25)
-        _sounds["clear"] = _beep(400, 80)
-        _sounds["level"] = _beep(520, 60)
-        _sounds["gameover"] = _beep(200, 300)
+        for name, params in SOUND_BANK.items():
+            _sounds[name] = _beep(*params)
     except Exception:
         _sounds.clear()
 
 
 def play(name):
+    if _sounds is None:
+        init_sounds()
     if name in _sounds:
         try:
             _sounds[name].play()
@@ -122,104 +114,100 @@ def play(name):
             pass
 
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Tetris")
-clock = pygame.time.Clock()
-init_sounds()
+# Created by init(); importing this module has no pygame side effects.
+screen = None
+clock = None
+_fonts = None
+
+
+def init(size=None):
+    """Initialize pygame, open the window (SCREEN_WIDTH x SCREEN_HEIGHT by
+    default) and return the screen surface."""
+    global screen, clock
+    if screen is None:
+        if size is None:
+            size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        # Mixer before display for sound
+        pygame.mixer.pre_init(SAMPLE_RATE, -16, 1, 512)
+        pygame.init()
+        screen = pygame.display.set_mode(size)
+        pygame.display.set_caption("Tetris")
+        clock = pygame.time.Clock()
+    return screen
+
+
+def get_fonts():
+    """Return (font, small_font), loading them on first use."""
+    global _fonts
+    if _fonts is None:
+        try:
+            _fonts = (pygame.font.Font(None, 26), pygame.font.Font(None, 22))
+        except Exception:
+            _fonts = (pygame.font.SysFont("arial", 18), pygame.font.SysFont("arial", 16))
+    return _fonts
 
-try:
-    font = pygame.font.Font(None, 26)
-    small_font = pygame.font.Font(None, 22)
-except Exception:
-    font = pygame.font.SysFont("arial", 18)
-    small_font = pygame.font.SysFont("arial", 16)
 
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color), LRU-bounded."""
 
-def load_high_score():
-    if os.path.exists(HIGH_SCORE_FILE):
-        try:
-            with open(HIGH_SCORE_FILE, "r") as f:
-                return int(f.read().strip())
-        except (ValueError, IOError):
-            pass
-    return 0
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._items = OrderedDict()
 
+    def render(self, font, text, color):
+        key = (font, text, color)
+        s = self._items.get(key)
+        if s is None:
+            s = font.render(text, True, color)
+            self._items[key] = s
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return s
 
-def save_high_score(score):
-    try:
-        with open(HIGH_SCORE_FILE, "w") as f:
-            f.write(str(score))
-    except IOError:
-        pass
-
-
-def get_shape_cells(shape_idx, rotation):
-    """Return the 4x4 or 3x3 matrix for the shape at given rotation (0-3)."""
-    s = SHAPES[shape_idx]
-    r = rotation % len(s)
-    return s[r]
-
-
-def get_spawn_x(shape_matrix):
-    """Return x position to center the shape in the grid."""
-    cols = len(shape_matrix[0])
-    min_x = next((x for x in range(cols) if any(row[x] for row in shape_matrix)), 0)
-    max_x = next((x for x in range(cols - 1, -1, -1) if any(row[x] for row in shape_matrix)), cols - 1)
-    width = max_x - min_x + 1
-    return (GRID_WIDTH - width) // 2 - min_x
-
-
-def valid_position(shape_matrix, pos_x, pos_y, locked):
-    """Check if the shape at (pos_x, pos_y) fits without collision."""
-    for y, row in enumerate(shape_matrix):
-        for x, cell in enumerate(row):
-            if cell:
-                nx, ny = pos_x + x, pos_y + y
-                if nx < 0 or nx >= GRID_WIDTH or ny >= GRID_HEIGHT:
-                    return False
-                if ny >= 0 and (nx, ny) in locked:
-                    return False
-    return True
-
-
-def get_ghost_y(shape_matrix, pos_x, pos_y, locked):
-    """Return the Y position where the piece would land (hard drop position)."""
-    gy = pos_y
-    while valid_position(shape_matrix, pos_x, gy + 1, locked):
-        gy += 1
-    return gy
-
-
-def create_grid(locked):
-    grid = [[GRID_BG for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    for (x, y), color in locked.items():
-        if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-            grid[y][x] = color
-    return grid
-
-
-def draw_block(surface, x, y, color, size=BLOCK_SIZE):
-    r = pygame.Rect(x * size, y * size, size - 1, size - 1)
-    pygame.draw.rect(surface, color, r)
-    pygame.draw.rect(surface, GRID_LINE, r, 1)
+
+class DigitAtlas:
+    """Pre-rendered 0-9 glyphs so numbers can be drawn without FreeType."""
+
+    def __init__(self, font, color):
+        self.glyphs = [font.render(str(d), True, color) for d in range(10)]
+        self.height = max(g.get_height() for g in self.glyphs)
+
+    def draw(self, surface, value, pos):
+        x, y = pos
+        glyphs = self.glyphs
+        for ch in str(value):
+            g = glyphs[ord(ch) - 48]
+            surface.blit(g, (x, y))
+            x += g.get_width()
 
 
-def draw_ghost_block(surface, x, y, color, size=BLOCK_SIZE):
+text_cache = TextCache()
+_atlases = {}
+
+
+def digits(font, color):
+    atlas = _atlases.get((font, color))
+    if atlas is None:
+        atlas = _atlases[(font, color)] = DigitAtlas(font, color)
+    return atlas
+
+
+def draw_block(surface, x, y, color, size=None):
+    size = size or BLOCK_SIZE
     r = pygame.Rect(x * size, y * size, size - 1, size - 1)
-    s = pygame.Surface((size, size))
-    s.set_alpha(GHOST_ALPHA)
-    s.fill(color)
-    surface.blit(s, r.topleft)
+    pygame.draw.rect(surface, color, r)
     pygame.draw.rect(surface, GRID_LINE, r, 1)
 
 
 def draw_grid(surface, grid):
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
+    for y in range(BOARD_HEIGHT):
+        for x in range(BOARD_WIDTH):
             draw_block(surface, x, y, grid[y][x])
-    for y in range(GRID_HEIGHT + 1):
+    for y in range(BOARD_HEIGHT + 1):
         pygame.draw.line(surface, GRID_LINE, (0, y * BLOCK_SIZE), (PLAY_W, y * BLOCK_SIZE), 1)
-    for x in range(GRID_WIDTH + 1):
+    for x in range(BOARD_WIDTH + 1):
         pygame.draw.line(surface, GRID_LINE, (x * BLOCK_SIZE, 0), (x * BLOCK_SIZE, PLAY_H), 1)
 
 
@@ -228,330 +216,525 @@ def draw_play_area(surface):
     pygame.draw.rect(surface, ACCENT, (0, 0, PLAY_W, PLAY_H), 1)
 
 
-def draw_piece(surface, shape_matrix, pos_x, pos_y, color, ghost=False, size=BLOCK_SIZE):
-    for y, row in enumerate(shape_matrix):
-        for x, cell in enumerate(row):
-            if cell:
-                nx, ny = pos_x + x, pos_y + y
-                if ny >= 0:
-                    if ghost:
-                        draw_ghost_block(surface, nx, ny, color, size)
-                    else:
-                        draw_block(surface, nx, ny, color, size)
-
-
-def _preview(surface, shape_idx, x, y, size=PREVIEW_SIZE):
-    mat = get_shape_cells(shape_idx, 0)
+def _preview(surface, shape_idx, x, y, size=PREVIEW_SIZE, width=None):
+    width = width or SIDEBAR_W
     color = COLORS[shape_idx]
-    cw, ch = len(mat[0]), len(mat)
-    ox = x + max(0, (SIDEBAR_W - cw * size) // 2)
+    cw = len(SHAPES[shape_idx][0])
+    ox = x + max(0, (width - cw * size) // 2)
     oy = y
-    for cy, row in enumerate(mat):
-        for cx, cell in enumerate(row):
-            if cell:
-                r = pygame.Rect(ox + cx * size, oy + cy * size, size - 1, size - 1)
-                pygame.draw.rect(surface, color, r)
-                pygame.draw.rect(surface, GRID_LINE, r, 1)
+    for cx, cy in SHAPE_TABLE[shape_idx][0].cells:
+        r = pygame.Rect(ox + cx * size, oy + cy * size, size - 1, size - 1)
+        pygame.draw.rect(surface, color, r)
+        pygame.draw.rect(surface, GRID_LINE, r, 1)
 
 
-def draw_sidebar(surface, next_idx, hold_idx, score, high_score, level, lines_cleared):
+def draw_sidebar(surface, upcoming, hold_idx, score, high_score, level, lines_cleared, autoplay=False):
+    """upcoming is the piece queue to show, next piece first."""
     pygame.draw.rect(surface, SIDEBAR_BG, (SIDEBAR_X, 0, SIDEBAR_W + MARGIN, SCREEN_HEIGHT))
     x = SIDEBAR_X
     w = SIDEBAR_W
     dy = MARGIN
 
-    surface.blit(small_font.render("HOLD", True, TEXT_MUTED), (x, dy))
+    font, small_font = get_fonts()
+    label = text_cache.render
+    number = digits(font, TEXT).draw
+
+    surface.blit(label(small_font, "HOLD", TEXT_MUTED), (x, dy))
     dy += 20
     if hold_idx is not None:
         _preview(surface, hold_idx, x, dy, PREVIEW_SIZE)
     dy += 52
 
-    surface.blit(small_font.render("NEXT", True, TEXT_MUTED), (x, dy))
+    surface.blit(label(small_font, "NEXT", TEXT_MUTED), (x, dy))
     dy += 20
-    if next_idx is not None:
-        _preview(surface, next_idx, x, dy, PREVIEW_SIZE)
-    dy += 52
-
-    dy += 8
-    surface.blit(small_font.render("SCORE", True, TEXT_MUTED), (x, dy))
-    surface.blit(font.render(str(score), True, TEXT), (x, dy + 18))
+    if upcoming:
+        _preview(surface, upcoming[0], x, dy, PREVIEW_SIZE)
+    dy += 40
+    half = w // 2
+    for i, shape_idx in enumerate(upcoming[1:]):
+        _preview(surface, shape_idx, x + half * (i & 1), dy + 22 * (i >> 1), QUEUE_SIZE, half)
+    dy += 22 * ((len(upcoming) + 1) // 2 - 1) + 8
+    surface.blit(label(small_font, "SCORE", TEXT_MUTED), (x, dy))
+    number(surface, score, (x, dy + 18))
     dy += 44
-    surface.blit(small_font.render("BEST", True, TEXT_MUTED), (x, dy))
-    surface.blit(font.render(str(high_score), True, TEXT), (x, dy + 18))
+    surface.blit(label(small_font, "BEST", TEXT_MUTED), (x, dy))
+    number(surface, high_score, (x, dy + 18))
     dy += 44
-    surface.blit(small_font.render("LEVEL", True, TEXT_MUTED), (x, dy))
-    surface.blit(font.render(str(level), True, TEXT), (x, dy + 18))
+    surface.blit(label(small_font, "LEVEL", TEXT_MUTED), (x, dy))
+    number(surface, level, (x, dy + 18))
     dy += 44
-    surface.blit(small_font.render("LINES", True, TEXT_MUTED), (x, dy))
-    surface.blit(font.render(str(lines_cleared), True, TEXT), (x, dy + 18))
-    dy += 52
+    surface.blit(label(small_font, "LINES", TEXT_MUTED), (x, dy))
+    number(surface, lines_cleared, (x, dy + 18))
+    dy += 48
 
-    surface.blit(small_font.render("P  Pause", True, TEXT_MUTED), (x, dy))
-
-
-def clear_full_rows(locked):
-    """Clear full rows and shift above blocks down. Returns number of lines cleared."""
-    full_rows = []
-    for y in range(GRID_HEIGHT):
-        if all((x, y) in locked for x in range(GRID_WIDTH)):
-            full_rows.append(y)
-    if not full_rows:
-        return 0
-    full_rows.sort()
-    new_locked = {}
-    for (x, y), color in locked.items():
-        if y in full_rows:
-            continue
-        num_below = sum(1 for r in full_rows if r > y)
-        new_locked[(x, y + num_below)] = color
-    locked.clear()
-    locked.update(new_locked)
-    return len(full_rows)
-
-
-def main():
-    high_score = load_high_score()
-
-    def init_game():
-        locked = {}
-        shape_idx = random.randint(0, len(SHAPES) - 1)
-        rotation = 0
-        next_idx = random.randint(0, len(SHAPES) - 1)
-        hold_idx = None
-        can_hold = True
-        pos_x = get_spawn_x(get_shape_cells(shape_idx, rotation))
-        pos_y = 0
-        score = 0
-        level = 1
-        lines_cleared_total = 0
-        fall_time = 0
-        fall_speed = INITIAL_FALL_SPEED
-        lock_timer = 0
-        return {
-            "locked": locked,
-            "shape_idx": shape_idx,
-            "rotation": rotation,
-            "next_idx": next_idx,
-            "hold_idx": hold_idx,
-            "can_hold": can_hold,
-            "pos_x": pos_x,
-            "pos_y": pos_y,
-            "score": score,
-            "level": level,
-            "lines_cleared_total": lines_cleared_total,
-            "fall_time": fall_time,
-            "fall_speed": fall_speed,
-            "lock_timer": lock_timer,
-        }
-
-    state = init_game()
+    surface.blit(label(small_font, "P  Pause", TEXT_MUTED), (x, dy))
+    dy += 20
+    surface.blit(label(small_font, "A  Autoplay", TEXT if autoplay else TEXT_MUTED), (x, dy))
+
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_DOWN: SOFT_DROP,
+    pygame.K_UP: ROTATE,
+    pygame.K_SPACE: HARD_DROP,
+    pygame.K_c: HOLD,
+}
+
+
+def make_block_sprite(color, size=None):
+    """A block exactly as draw_block paints it, ready to blit."""
+    size = size or BLOCK_SIZE
+    s = pygame.Surface((size - 1, size - 1)).convert()
+    draw_block(s, 0, 0, color, size)
+    return s
+
+
+def make_ghost_sprite(color, size=None):
+    """A ghost block pre-blended over an empty cell."""
+    size = size or BLOCK_SIZE
+    s = pygame.Surface((size - 1, size - 1)).convert()
+    draw_block(s, 0, 0, GRID_BG, size)
+    tint = pygame.Surface((size - 1, size - 1))
+    tint.set_alpha(GHOST_ALPHA)
+    tint.fill(color)
+    s.blit(tint, (0, 0))
+    pygame.draw.rect(s, GRID_LINE, s.get_rect(), 1)
+    return s
+
+
+def _ms(value):
+    return "%.2f" % value if value < 10 else "%.1f" % value
+
+
+class Renderer:
+    """Draws a TetrisEngine using cached sprites and dirty rectangles.
+
+    The empty well is drawn once and the locked stack is kept on a persistent
+    surface that is rebuilt only when the board changes. Each frame restores
+    the cells under last frame's piece and ghost from that surface, draws the
+    new ones, redraws the sidebar only when its values change, and returns
+    the changed rectangles for pygame.display.update.
+
+    Set profiler to a profiler.Profiler to time the sidebar redraw and show
+    rolling p50/p99 phase times in the sidebar.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.blocks = {color: make_block_sprite(color) for color in CELL_COLORS}
+        self.ghosts = {color: make_ghost_sprite(color) for color in COLORS}
+        # Grid lines run one pixel past the play area on the right and bottom.
+        self.well = pygame.Surface((PLAY_W + 1, PLAY_H + 1)).convert()
+        self.well.fill(BG)
+        draw_play_area(self.well)
+        draw_grid(self.well, [[GRID_BG] * BOARD_WIDTH for _ in range(BOARD_HEIGHT)])
+        self.stack = self.well.copy()
+        self.sidebar_rect = pygame.Rect(SIDEBAR_X, 0, SIDEBAR_W + MARGIN, SCREEN_HEIGHT)
+        self.fps_rect = pygame.Rect(SIDEBAR_X, SCREEN_HEIGHT - MARGIN - 18, SIDEBAR_W, 18)
+        self.profile_rect = pygame.Rect(SIDEBAR_X, self.fps_rect.top - 4 - PROFILE_ROWS * 16,
+                                        SIDEBAR_W, PROFILE_ROWS * 16)
+        self.profiler = NULL_PROFILER
+        self._overlays = {}
+        self.show_frame_time = False
+        self.autoplay = False
+        self.frame_ms = 0.0
+        self._frame_total = 0.0
+        self._frame_count = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (e.g. after an overlay)."""
+        self._full = True
+        self._overlay_shown = False
+        self._board = None
+        self._version = -1
+        self._piece_rects = []
+        self._sidebar_key = None
+
+    def _rebuild_stack(self, board):
+        stack = self.stack
+        stack.blit(self.well, (0, 0))
+        blocks = self.blocks
+        for y, codes in enumerate(board.colors):
+            if board.rows[y]:
+                for x, code in enumerate(codes):
+                    if code:
+                        stack.blit(blocks[CELL_COLORS[code - 1]], (x * BLOCK_SIZE, y * BLOCK_SIZE))
+        self._board = board
+        self._version = board.version
+
+    def draw(self, game, high_score):
+        """Draw the frame and return the list of changed rectangles."""
+        surface = self.surface
+        stack = self.stack
+        dirty = []
+        board = game.board
+        stack_changed = board is not self._board or board.version != self._version
+        if stack_changed:
+            self._rebuild_stack(board)
+        if self._full:
+            surface.fill(BG)
+            surface.blit(stack, (0, 0))
+            dirty.append(surface.get_rect())
+            self._full = False
+        elif stack_changed:
+            surface.blit(stack, (0, 0))
+            dirty.append(stack.get_rect())
+        else:
+            for r in self._piece_rects:
+                surface.blit(stack, r, r)
+            dirty.extend(self._piece_rects)
+
+        rects = []
+        if not game.game_over:
+            color = game.color
+            cells = game.shape_info.cells
+            for sprite, pos_y in ((self.ghosts[color], game.ghost_y()), (self.blocks[color], game.pos_y)):
+                for x, y in cells:
+                    ny = pos_y + y
+                    if ny >= 0:
+                        rects.append(surface.blit(sprite, ((game.pos_x + x) * BLOCK_SIZE, ny * BLOCK_SIZE)))
+        self._piece_rects = rects
+        dirty.extend(rects)
+
+        key = (tuple(game.preview(PREVIEW_COUNT)), game.hold_idx, game.score, high_score, game.level, game.lines_cleared_total,
+               self.autoplay)
+        if key != self._sidebar_key:
+            start = self.profiler.mark()
+            self._sidebar_key = key
+            draw_sidebar(surface, *key)
+            dirty.append(self.sidebar_rect)
+            if self.show_frame_time:
+                self._draw_frame_time()
+            if self.profiler.enabled:
+                self._draw_profile()
+            self.profiler.add("side", start)
+        return dirty
+
+    def draw_overlay(self, game, high_score, alpha, lines):
+        """Draw the frame dimmed under centered (text, font, color, y) lines.
+
+        The overlay is drawn once after each invalidate(); returns True when
+        something was drawn and the display needs a flip.
+        """
+        if self._overlay_shown:
+            return False
+        self.invalidate()
+        self.draw(game, high_score)
+        dim = self._overlays.get(alpha)
+        if dim is None:
+            dim = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            dim.set_alpha(alpha)
+            dim.fill(BG)
+            self._overlays[alpha] = dim
+        self.surface.blit(dim, (0, 0))
+        for text, font, color, y in lines:
+            s = text_cache.render(font, text, color)
+            self.surface.blit(s, (SCREEN_WIDTH // 2 - s.get_width() // 2, y))
+        self.invalidate()
+        self._overlay_shown = True
+        return True
+
+    def record_frame(self, seconds):
+        """Accumulate frame time; refresh the readout twice a second at 60 FPS."""
+        self._frame_total += seconds
+        self._frame_count += 1
+        if self._frame_count < 30:
+            return []
+        self.frame_ms = self._frame_total * 1000.0 / self._frame_count
+        self._frame_total = 0.0
+        self._frame_count = 0
+        dirty = []
+        if self.show_frame_time:
+            self._draw_frame_time()
+            dirty.append(self.fps_rect)
+        if self.profiler.enabled:
+            self._draw_profile()
+            dirty.append(self.profile_rect)
+        return dirty
+
+    def _draw_frame_time(self):
+        pygame.draw.rect(self.surface, SIDEBAR_BG, self.fps_rect)
+        text = text_cache.render(get_fonts()[1], "frame %.2f ms" % self.frame_ms, TEXT_MUTED)
+        self.surface.blit(text, self.fps_rect.topleft)
+
+    def _draw_profile(self):
+        # Numbers change every refresh, so they bypass the text cache.
+        pygame.draw.rect(self.surface, SIDEBAR_BG, self.profile_rect)
+        small_font = get_fonts()[1]
+        x, y = self.profile_rect.topleft
+        rows = [("ms", "p50", "p99")] + [(phase, _ms(p50), _ms(p99))
+                                         for phase, p50, p99 in self.profiler.stats()[-(PROFILE_ROWS - 1):]]
+        for phase, p50, p99 in rows:
+            self.surface.blit(small_font.render(phase, True, TEXT_MUTED), (x, y))
+            for text, right in ((p50, x + 72), (p99, self.profile_rect.right)):
+                s = small_font.render(text, True, TEXT_MUTED)
+                self.surface.blit(s, (right - s.get_width(), y))
+            y += 16
+
+
+def _resume():
+    """The suspended practice game, if any; the file is used up."""
+    try:
+        with open(SUSPEND_FILE, "rb") as f:
+            snapshot = Snapshot.from_bytes(f.read())
+    except (IOError, ValueError):
+        return None
+    os.remove(SUSPEND_FILE)
+    return TetrisEngine.from_snapshot(snapshot)
+
+
+def _game_over_lines(game, font, small_font, best_time=None):
+    """draw_overlay() lines for a finished game: a completed goal shows its time and the best one."""
+    mid = SCREEN_HEIGHT // 2
+    if not game.completed:
+        return (("GAME OVER", font, TEXT, mid - 30),
+                ("SPACE to restart", font, TEXT_MUTED, mid + 10))
+    lines = (("%d LINES" % game.rules.line_goal, font, TEXT, mid - 40),
+             ("%.2f s" % game.elapsed, font, TEXT, mid - 10),
+             ("SPACE to restart", small_font, TEXT_MUTED, mid + 24))
+    if best_time is not None:
+        lines += (("BEST %.2f s" % best_time, small_font, TEXT_MUTED, mid + 44),)
+    return lines
+
+
+def main(profile=False, trace=None, das=DAS, arr=ARR, player=None, practice=False,
+         generator=DEFAULT_GENERATOR, mode="marathon"):
+    """Play in the window. With profile (or a trace path) the main loop's
+    phases are timed and shown in the sidebar; trace is written on exit.
+    das and arr are the auto-shift delay and repeat period in seconds;
+    finished games go to the score store under player and the game's mode.
+    generator names the piece randomizer (see pieces.py) and mode the rule
+    set (engine.RULESETS).
+
+    A practice game is neither recorded nor scored: Z takes back the last
+    piece, and quitting suspends the game to resume on the next practice run.
+    """
+    # Imported here rather than at the top so importing tetris stays cheap.
+    import replay
+    import scores
+    from ai import AutoPlayer
+
+    prof = Profiler() if profile or trace else NULL_PROFILER
+    player = player or scores.default_player()
+    game = _resume() if practice else None
+    if game is None:
+        game = TetrisEngine(replay.new_seed(), generator, RULESETS[mode])
+    rules = game.rules
+    store = scores.open_store()
+    high_score = store.best(rules.name)
+    # Modes with a line goal rank by time (see scores.TIMED_MODES).
+    best_time = store.best_time(rules.name) if rules.line_goal else None
+    if practice:
+        recorder = replay.NULL_RECORDER
+    else:
+        recorder = replay.start_recording(game.seed, generator=game.generator, rules=rules)
+    # Snapshots at each piece's spawn; the last one is the current piece.
+    history = deque([game.snapshot()], maxlen=UNDO_DEPTH + 1)
+    set_board(rules.width, rules.height)
+    screen = init()
+    font, small_font = get_fonts()
+    renderer = Renderer(screen)
+    renderer.profiler = prof
+    controls = Controls(das, arr, rules=rules)
+    autoplayer = None
     paused = False
-    game_over = False
     run = True
+    # Logic and input run at the engine's TICK_RATE; the screen is redrawn at
+    # most FRAME_RATE times a second and frames that are late are skipped.
+    # Key events carry no time of their own, so they are stamped when drained,
+    # which happens every tick rather than every frame.
+    ticks = FixedStep()
+    frames = FixedStep(FRAME_RATE, max_lag=0)
 
     while run:
-        delta_ms = clock.tick(60)
-        locked = state["locked"]
-        shape_idx = state["shape_idx"]
-        rotation = state["rotation"]
-        next_idx = state["next_idx"]
-        hold_idx = state["hold_idx"]
-        can_hold = state["can_hold"]
-        pos_x, pos_y = state["pos_x"], state["pos_y"]
-        score = state["score"]
-        level = state["level"]
-        lines_cleared_total = state["lines_cleared_total"]
-        fall_speed = state["fall_speed"]
-        lock_timer = state["lock_timer"]
-
-        shape_matrix = get_shape_cells(shape_idx, rotation)
-        color = COLORS[shape_idx]
+        ticks.wait()
+        due = ticks.due()
+        draw = frames.due()
 
         # Events
+        start = prof.mark()
+        now = time.perf_counter()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
                 continue
+            if event.type == pygame.KEYUP and event.key in KEY_ACTIONS:
+                controls.release(KEY_ACTIONS[event.key], now)
+                continue
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:
                     paused = not paused
+                    controls.clear()
+                    renderer.invalidate()
+                    continue
+                if event.key == pygame.K_F3:
+                    renderer.show_frame_time = not renderer.show_frame_time
+                    renderer.invalidate()
                     continue
-                if game_over:
+                if event.key == pygame.K_a:
+                    autoplayer = None if autoplayer else AutoPlayer()
+                    renderer.autoplay = autoplayer is not None
+                    controls.clear()
+                    continue
+                if event.key == pygame.K_z and practice and not paused:
+                    if len(history) > 1:
+                        history.pop()
+                        game.restore(history[-1])
+                        controls.clear()
+                        renderer.invalidate()
+                    continue
+                if game.game_over:
                     if event.key == pygame.K_SPACE:
-                        state = init_game()
-                        game_over = False
+                        game.reset(replay.new_seed())
+                        if not practice:
+                            recorder = replay.start_recording(game.seed, generator=game.generator, rules=rules)
+                        history = deque([game.snapshot()], maxlen=UNDO_DEPTH + 1)
+                        renderer.invalidate()
                     continue
                 if paused:
                     continue
-
-                if event.key == pygame.K_LEFT:
-                    if valid_position(shape_matrix, pos_x - 1, pos_y, locked):
-                        state["pos_x"] = pos_x - 1
-                        state["lock_timer"] = 0
-                        play("move")
-                elif event.key == pygame.K_RIGHT:
-                    if valid_position(shape_matrix, pos_x + 1, pos_y, locked):
-                        state["pos_x"] = pos_x + 1
-                        state["lock_timer"] = 0
-                        play("move")
-                elif event.key == pygame.K_DOWN:
-                    if valid_position(shape_matrix, pos_x, pos_y + 1, locked):
-                        state["pos_y"] = pos_y + 1
-                        state["score"] = score + SOFT_DROP_POINTS
-                        state["lock_timer"] = 0
-                elif event.key == pygame.K_UP:
-                    new_rot = (rotation + 1) % 4
-                    new_mat = get_shape_cells(shape_idx, new_rot)
-                    if valid_position(new_mat, pos_x, pos_y, locked):
-                        state["rotation"] = new_rot
-                        state["lock_timer"] = 0
-                        play("rotate")
-                elif event.key == pygame.K_SPACE:
-                    play("drop")
-                    gy = get_ghost_y(shape_matrix, pos_x, pos_y, locked)
-                    drop_dist = gy - pos_y
-                    state["pos_y"] = gy
-                    state["score"] = score + HARD_DROP_POINTS * drop_dist
-                    state["fall_time"] = 0
-                    for y, row in enumerate(shape_matrix):
-                        for x, cell in enumerate(row):
-                            if cell:
-                                nx, ny = pos_x + x, gy + y
-                                if ny >= 0:
-                                    locked[(nx, ny)] = color
-                    lines = clear_full_rows(locked)
-                    if lines:
-                        play("clear")
-                    state["score"] += SCORE_PER_LINE[lines] * level
-                    state["lines_cleared_total"] = lines_cleared_total + lines
-                    new_level = (lines_cleared_total + lines) // LINES_PER_LEVEL + 1
-                    if new_level > level:
-                        state["level"] = new_level
-                        state["fall_speed"] = max(MIN_FALL_SPEED, INITIAL_FALL_SPEED - (new_level - 1) * LEVEL_SPEED_DECREASE)
-                        play("level")
-                    state["shape_idx"] = next_idx
-                    state["rotation"] = 0
-                    state["next_idx"] = random.randint(0, len(SHAPES) - 1)
-                    state["pos_x"] = get_spawn_x(get_shape_cells(next_idx, 0))
-                    state["pos_y"] = 0
-                    state["can_hold"] = True
-                    state["lock_timer"] = 0
-                    if not valid_position(get_shape_cells(next_idx, 0), state["pos_x"], 0, locked):
-                        game_over = True
-                        play("gameover")
-                        if state["score"] > high_score:
-                            high_score = state["score"]
-                            save_high_score(high_score)
-                    continue
-                elif event.key == pygame.K_c:
-                    if not can_hold:
-                        pass
-                    else:
-                        if hold_idx is None:
-                            state["hold_idx"] = shape_idx
-                            state["shape_idx"] = next_idx
-                            state["rotation"] = 0
-                            state["next_idx"] = random.randint(0, len(SHAPES) - 1)
-                            state["pos_x"] = get_spawn_x(get_shape_cells(next_idx, 0))
-                            state["pos_y"] = 0
-                        else:
-                            state["hold_idx"] = shape_idx
-                            state["shape_idx"] = hold_idx
-                            state["rotation"] = 0
-                            state["pos_x"] = get_spawn_x(get_shape_cells(hold_idx, 0))
-                            state["pos_y"] = 0
-                        state["can_hold"] = False
-
-        if game_over:
-            screen.fill(BG)
-            draw_play_area(screen)
-            grid = create_grid(locked)
-            draw_grid(screen, grid)
-            draw_sidebar(screen, next_idx, hold_idx, state["score"], high_score, state["level"], state["lines_cleared_total"])
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(200)
-            overlay.fill(BG)
-            screen.blit(overlay, (0, 0))
-            go = font.render("GAME OVER", True, TEXT)
-            r = font.render("SPACE to restart", True, TEXT_MUTED)
-            screen.blit(go, (SCREEN_WIDTH // 2 - go.get_width() // 2, SCREEN_HEIGHT // 2 - 30))
-            screen.blit(r, (SCREEN_WIDTH // 2 - r.get_width() // 2, SCREEN_HEIGHT // 2 + 10))
-            pygame.display.flip()
+                if event.key in KEY_ACTIONS and autoplayer is None:
+                    controls.press(KEY_ACTIONS[event.key], now)
+        actions = controls.poll(now)
+        prof.add("input", start)
+
+        if game.game_over:
+            if draw and renderer.draw_overlay(game, high_score, 200, _game_over_lines(game, font, small_font, best_time)):
+                pygame.display.flip()
             continue
 
         if paused:
-            screen.fill(BG)
-            draw_play_area(screen)
-            grid = create_grid(locked)
-            draw_grid(screen, grid)
-            draw_piece(screen, shape_matrix, pos_x, pos_y, color)
-            ghost_y = get_ghost_y(shape_matrix, pos_x, pos_y, locked)
-            draw_piece(screen, shape_matrix, pos_x, ghost_y, color, ghost=True)
-            draw_sidebar(screen, next_idx, hold_idx, score, high_score, level, lines_cleared_total)
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(180)
-            overlay.fill(BG)
-            screen.blit(overlay, (0, 0))
-            p = font.render("PAUSED", True, TEXT)
-            screen.blit(p, (SCREEN_WIDTH // 2 - p.get_width() // 2, SCREEN_HEIGHT // 2 - 14))
-            pygame.display.flip()
+            if draw and renderer.draw_overlay(game, high_score, 180, (
+                    ("PAUSED", font, TEXT, SCREEN_HEIGHT // 2 - 14),)):
+                pygame.display.flip()
             continue
 
-        # Gravity
-        state["fall_time"] += delta_ms / 1000.0
-        if state["fall_time"] >= fall_speed:
-            state["fall_time"] = 0
-            if valid_position(shape_matrix, pos_x, pos_y + 1, locked):
-                state["pos_y"] = pos_y + 1
-                state["lock_timer"] = 0
-
-        # Lock delay: when piece has landed, wait LOCK_DELAY before locking (so you can slide)
-        if not valid_position(shape_matrix, pos_x, pos_y + 1, locked):
-            state["lock_timer"] += delta_ms / 1000.0
-            if state["lock_timer"] >= LOCK_DELAY:
-                for y, row in enumerate(shape_matrix):
-                    for x, cell in enumerate(row):
-                        if cell:
-                            nx, ny = pos_x + x, pos_y + y
-                            if ny >= 0:
-                                locked[(nx, ny)] = color
-                lines = clear_full_rows(locked)
-                if lines:
-                    play("clear")
-                state["score"] += SCORE_PER_LINE[lines] * level
-                state["lines_cleared_total"] = lines_cleared_total + lines
-                new_level = (lines_cleared_total + lines) // LINES_PER_LEVEL + 1
-                if new_level > level:
-                    state["level"] = new_level
-                    state["fall_speed"] = max(MIN_FALL_SPEED, INITIAL_FALL_SPEED - (new_level - 1) * LEVEL_SPEED_DECREASE)
-                    play("level")
-                state["shape_idx"] = next_idx
-                state["rotation"] = 0
-                state["next_idx"] = random.randint(0, len(SHAPES) - 1)
-                state["pos_x"] = get_spawn_x(get_shape_cells(next_idx, 0))
-                state["pos_y"] = 0
-                state["can_hold"] = True
-                state["lock_timer"] = 0
-                if not valid_position(get_shape_cells(next_idx, 0), state["pos_x"], 0, locked):
-                    game_over = True
-                    play("gameover")
-                    if state["score"] > high_score:
-                        high_score = state["score"]
-                        save_high_score(high_score)
-
-        # Draw
-        screen.fill(BG)
-        draw_play_area(screen)
-        grid = create_grid(locked)
-        draw_grid(screen, grid)
-        ghost_y = get_ghost_y(shape_matrix, pos_x, pos_y, locked)
-        draw_piece(screen, shape_matrix, pos_x, ghost_y, color, ghost=True)
-        draw_piece(screen, shape_matrix, pos_x, pos_y, color)
-        draw_sidebar(screen, next_idx, hold_idx, state["score"], high_score, state["level"], state["lines_cleared_total"])
-        pygame.display.flip()
+        # Logic: key actions first, then gravity and lock delay for each tick
+        # that came due. Autoplay makes one move per frame so it can be watched.
+        if autoplayer is not None and draw:
+            start = prof.mark()
+            actions.append(autoplayer(game))
+            prof.add("ai", start)
+        events = []
+        pieces = game.pieces_placed
+        start = prof.mark()
+        for action in actions:
+            events += recorder.step(game, action)
+        prof.add("logic", start)
+        # Ticks that lock a piece (and clear lines) are timed apart from the rest.
+        for _ in range(due):
+            if game.game_over:
+                break
+            start = prof.mark()
+            placed = game.pieces_placed
+            events += recorder.tick(game)
+            prof.add("logic" if game.pieces_placed == placed else "lock", start)
+        # A fast auto-repeat can move several times per tick; one sound each.
+        for name in dict.fromkeys(events):
+            play(name)
+        if practice and game.pieces_placed != pieces:
+            history.append(game.snapshot())
+        if game.game_over:
+            controls.clear()
+            if not practice:
+                recorder.end(game)
+                store.submit(player, rules.name, game)
+                high_score = max(high_score, game.score)
+                if game.completed and (best_time is None or game.elapsed < best_time):
+                    best_time = game.elapsed
+
+        # Draw: only the rectangles that changed reach the display
+        if not draw:
+            continue
+        frame_start = time.perf_counter()
+        start = prof.mark()
+        dirty = renderer.draw(game, high_score)
+        prof.add("draw", start)
+        start = prof.mark()
+        pygame.display.update(dirty)
+        prof.add("flip", start)
+        dirty = renderer.record_frame(time.perf_counter() - frame_start)
+        if dirty:
+            pygame.display.update(dirty)
+        prof.end_frame()
+
+    recorder.close()
+    store.close()
+    if practice and not game.game_over:
+        with open(SUSPEND_FILE, "wb") as f:
+            f.write(game.snapshot().to_bytes())
+    if trace:
+        prof.export_trace(trace)
+    pygame.quit()
 
+
+def watch(path):
+    """Play a replay file back in the window at its recorded speed."""
+    import replay
+    import scores
+
+    rec = replay.Replay(path)
+    game = TetrisEngine(rec.seed, rec.generator, rec.rules)
+    set_board(rec.rules.width, rec.rules.height)
+    screen = init()
+    font = get_fonts()[0]
+    renderer = Renderer(screen)
+    store = scores.open_store()
+    high_score = store.best(rec.rules.name)
+    store.close()
+    ticks = FixedStep()
+    frames = FixedStep(FRAME_RATE, max_lag=0)
+    credit = 0
+
+    for count, action in rec.records():
+        for _ in range(count):
+            while not credit:
+                ticks.wait()
+                credit = ticks.due()
+                if frames.due():
+                    if pygame.event.peek(pygame.QUIT):
+                        pygame.quit()
+                        return
+                    pygame.event.pump()
+                    pygame.display.update(renderer.draw(game, high_score))
+            credit -= 1
+            for name in game.tick():
+                play(name)
+        if action != NONE:
+            for name in game.step(action, 0.0):
+                play(name)
+
+    while not pygame.event.peek(pygame.QUIT):
+        if renderer.draw_overlay(game, high_score, 200, (
+                ("REPLAY END", font, TEXT, SCREEN_HEIGHT // 2 - 14),)):
+            pygame.display.flip()
+        pygame.event.pump()
+        clock.tick(30)
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Minimal Tetris.")
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded game instead of playing")
+    parser.add_argument("--profile", action="store_true", help="show per-phase p50/p99 times in the sidebar")
+    parser.add_argument("--trace", metavar="FILE", help="profile and write a Chrome trace JSON on exit")
+    parser.add_argument("--das", type=float, default=DAS * 1000,
+                        help="ms a direction is held before it repeats (default %(default)g)")
+    parser.add_argument("--arr", type=float, default=ARR * 1000,
+                        help="ms between repeats, 0 for instant (default %(default)g)")
+    parser.add_argument("--player", help="name on the leaderboard (default: the login name)")
+    parser.add_argument("--generator", choices=GENERATOR_NAMES, default=DEFAULT_GENERATOR,
+                        help="piece randomizer (default %(default)s)")
+    parser.add_argument("--mode", choices=RULESET_NAMES, default="marathon",
+                        help="rule set: sprint (40 lines against the clock), zen (no gravity), "
+                             "wide, huge or marathon (default %(default)s)")
+    parser.add_argument("--practice", action="store_true",
+                        help="unrecorded game with undo (Z), suspended on quit and resumed next time")
+    args = parser.parse_args()
+    if args.replay:
+        watch(args.replay)
+    else:
+        main(args.profile, args.trace, args.das / 1000, args.arr / 1000, args.player, args.practice,
+             args.generator, args.mode)
@@ -0,0 +1,753 @@
+"""
+Versus over the network: two players get the same piece sequence, and the
+lines one clears rise as garbage under the other (the rules'
+garbage_per_line: 1 for a double, 2 for a triple, 4 for a Tetris, less
+whatever was incoming). The last one standing wins, or with a line goal
+(sprint) the first to reach it. Any number of spectators can watch.
+
+    python versus.py serve                     # host a match on PORT
+    python versus.py serve --mode wide         # ... on a 16-wide board
+    python versus.py play HOST                 # join as a player, SPACE when ready
+    python versus.py watch HOST                # join as a spectator
+    python versus.py local --spectators 50     # server, two AI players and 50 headless
+                                               # spectators in one process on localhost
+
+The server owns both games and runs them at the engine's TICK_RATE; clients
+only send input and draw what they are sent. DAS/ARR run on the client, so
+just the resulting actions travel. There is no prediction: a move shows one
+round trip (plus up to one broadcast period) after the key press, which on a
+LAN is below a frame.
+
+Protocol, over asyncio streams (TCP). Every message is a 2-byte
+little-endian length and a payload whose first byte is its type:
+
+    client -> server   HELLO role            PLAYER_ROLE or SPECTATOR_ROLE
+                       INPUT action          an engine action
+                       READY                 start (or rematch) once both players are
+    server -> client   WELCOME seat          0, 1, or SPECTATOR
+                       FULL seat running snapshot
+                       DELTA seat changes
+                       RESULT winner         a seat, or DRAW
+
+A FULL is Snapshot.to_bytes() of one game (about 200 bytes, rule set
+included), sent when a connection joins and when a match starts. After that a game goes out
+BROADCAST_RATE times a second as a DELTA, and only when something changed:
+a varint bitmask of the WIRE_FIELDS that changed and their new values as
+varints, a byte of EVENTS bits (for sounds), then the changed rows as y and
+their packed color codes (the row mask follows from the colors). A falling
+piece costs about 5 bytes, a lock 20 to 30. Each broadcast is encoded once
+and the same bytes are written to every connection, so a spectator costs
+one socket write per broadcast; one that falls MAX_BUFFER bytes behind is
+dropped. The server and the headless clients never import pygame.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from itertools import islice
+
+from engine import (
+    ACTIONS, DEFAULT_RULES, NONE, RULESETS, RULESET_NAMES,
+    FixedStep, Snapshot, TetrisEngine, pack_color_row, unpack_color_row,
+)
+from controls import ARR, DAS, Controls
+from pieces import DEFAULT_GENERATOR, GENERATOR_NAMES
+from replay import get_varint, put_varint
+
+PORT = 7777
+BROADCAST_RATE = 60  # deltas per second, at most
+MAX_BUFFER = 256 * 1024  # bytes queued for one connection before it is dropped
+
+# Message types
+HELLO = 1
+INPUT = 2
+READY = 3
+WELCOME = 16
+FULL = 17
+DELTA = 18
+RESULT = 19
+
+PLAYER_ROLE = 0
+SPECTATOR_ROLE = 1
+SPECTATOR = 255  # seat of a spectator
+DRAW = 255  # winner when both top out, or both finish, on the same tick
+
+EVENTS = ("move", "rotate", "drop", "clear", "level", "gameover")
+EVENT_BITS = {name: 1 << i for i, name in enumerate(EVENTS)}
+
+# What a DELTA can carry, in bitmask order; see wire_state().
+WIRE_FIELDS = (
+    "piece_index", "shape_idx", "rotation", "next_idx", "hold_idx", "can_hold",
+    "pos_x", "pos_y", "score", "level", "lines_cleared_total", "pieces_placed",
+    "game_over", "incoming",
+)
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def wire_state(game):
+    """The WIRE_FIELDS of game as non-negative ints.
+
+    hold_idx is stored plus one (0 = empty), positions zigzag-encoded and
+    incoming as the total number of pending garbage lines.
+    """
+    hold = game.hold_idx
+    return (game.piece_index, game.shape_idx, game.rotation, game.next_idx,
+            0 if hold is None else hold + 1, int(game.can_hold),
+            _zigzag(game.pos_x), _zigzag(game.pos_y), game.score, game.level,
+            game.lines_cleared_total, game.pieces_placed, int(game.game_over),
+            sum(count for count, _ in game.incoming))
+
+
+def _set_wire_field(game, i, value):
+    name = WIRE_FIELDS[i]
+    if name == "hold_idx":
+        value = value - 1 if value else None
+    elif name in ("can_hold", "game_over"):
+        value = bool(value)
+    elif name in ("pos_x", "pos_y"):
+        value = _unzigzag(value)
+    elif name == "incoming":
+        value = ((value, 0),) if value else ()
+    setattr(game, name, value)
+
+
+def changed_rows(colors, old_colors):
+    """[(y, codes)] for the rows of colors that differ from old_colors."""
+    if colors is old_colors:
+        return []
+    return [(y, codes) for y, (codes, old) in enumerate(zip(colors, old_colors))
+            if codes is not old and codes != old]
+
+
+def encode_delta(seat, state, old_state, rows, events):
+    """A DELTA payload: the fields of state that differ from old_state (all of
+    them if old_state is None), the event bits and the given rows."""
+    out = bytearray((DELTA, seat))
+    mask = 0
+    values = []
+    for i, value in enumerate(state):
+        if old_state is None or value != old_state[i]:
+            mask |= 1 << i
+            values.append(value)
+    put_varint(out, mask)
+    for value in values:
+        put_varint(out, value)
+    out.append(events)
+    put_varint(out, len(rows))
+    for y, codes in rows:
+        put_varint(out, y)
+        out += pack_color_row(codes)
+    return bytes(out)
+
+
+def apply_delta(game, payload):
+    """Patch game with a DELTA payload; returns its event bits."""
+    data = iter(payload)
+    next(data), next(data)  # type and seat
+    mask = get_varint(data)
+    i = 0
+    while mask:
+        if mask & 1:
+            _set_wire_field(game, i, get_varint(data))
+        mask >>= 1
+        i += 1
+    events = next(data)
+    count = get_varint(data)
+    if count:
+        board = game.board
+        width = board.rules.width
+        row_bytes = board.rules.color_row_bytes
+        rows = list(board.rows)
+        colors = list(board.colors)
+        for _ in range(count):
+            y = get_varint(data)
+            codes = unpack_color_row(bytes(islice(data, row_bytes)), width)
+            colors[y] = codes
+            rows[y] = sum(1 << x for x, code in enumerate(codes) if code)
+        board.rows = rows
+        board.colors = colors
+        board.refresh()
+    return events
+
+
+def frame(payload):
+    return len(payload).to_bytes(2, "little") + payload
+
+
+async def read_message(reader):
+    size = int.from_bytes(await reader.readexactly(2), "little")
+    return await reader.readexactly(size)
+
+
+class Connection:
+    __slots__ = ("writer", "seat", "ready")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.seat = None
+        self.ready = False
+
+
+def match_result(games):
+    """The winning seat of a finished match, or DRAW.
+
+    A game that reached the rules' line_goal wins, and two that reach it on
+    the same tick draw; otherwise the game that did not top out wins.
+    """
+    done = [game.completed for game in games]
+    if not any(done):
+        done = [not game.game_over for game in games]
+        if not any(done):
+            return DRAW
+    return DRAW if all(done) else done.index(True)
+
+
+class VersusServer:
+    """Runs a match's two games and fans their changes out to every connection.
+
+    The first two connections that say HELLO as players take seats 0 and 1;
+    everyone else watches. Seats are only handed out between matches, so a
+    seat freed by a forfeit stays empty until the match ends. A match starts
+    when both players are READY, and a player who disconnects forfeits. seed
+    fixes the match seeds and the garbage holes; rules must be one of the
+    named RULESETS, which FULLs carry to the clients.
+    """
+
+    def __init__(self, seed=None, generator=DEFAULT_GENERATOR, broadcast_rate=BROADCAST_RATE,
+                 rules=DEFAULT_RULES):
+        self.rng = random.Random(seed)
+        self.generator = generator
+        self.rules = rules
+        self.broadcast_rate = broadcast_rate
+        self.seats = [None, None]
+        self.viewers = []  # connections that have every broadcast so far
+        self.joining = []  # connections owed a FULL at the next broadcast
+        self.running = False
+        self.result = None  # winner of the last match
+        self.matches = 0
+        self.deltas = 0
+        self.delta_bytes = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self._announce = None
+        self.listener = None
+        self.task = None
+        self._new_games()
+
+    def _new_games(self):
+        seed = self.rng.getrandbits(63)
+        self.games = [TetrisEngine(seed, self.generator, self.rules) for _ in range(2)]
+        self.inputs = [[], []]
+        self.events = [0, 0]
+        # (wire state, board colors) as of the last broadcast, per game
+        self.sent = [(wire_state(game), game.board.colors) for game in self.games]
+        # Nobody has the new games yet.
+        self.joining += self.viewers
+        self.viewers = []
+
+    async def start(self, host="", port=PORT):
+        """Listen and start the simulation; returns the asyncio server."""
+        self.listener = await asyncio.start_server(self._connection, host, port)
+        self.task = asyncio.ensure_future(self._run())
+        return self.listener
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        if self.listener is not None:
+            self.listener.close()
+        for conn in self.viewers + self.joining:
+            conn.writer.close()
+
+    async def _connection(self, reader, writer):
+        conn = Connection(writer)
+        try:
+            while True:
+                payload = await read_message(reader)
+                if payload:
+                    self._handle(conn, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._leave(conn)
+            writer.close()
+
+    def _handle(self, conn, payload):
+        kind = payload[0]
+        if kind == INPUT:
+            if self.running and conn.seat in (0, 1) and len(payload) == 2 and payload[1] in ACTIONS:
+                self.inputs[conn.seat].append(payload[1])
+        elif kind == HELLO and conn.seat is None:
+            seat = SPECTATOR
+            if payload[1:] == bytes((PLAYER_ROLE,)) and not self.running and None in self.seats:
+                seat = self.seats.index(None)
+                self.seats[seat] = conn
+            conn.seat = seat
+            self._send(conn, frame(bytes((WELCOME, seat))))
+            self.joining.append(conn)
+        elif kind == READY and conn.seat in (0, 1) and not self.running:
+            conn.ready = True
+            if all(c is not None and c.ready for c in self.seats):
+                self._start()
+
+    def _leave(self, conn):
+        if conn.seat in (0, 1) and self.seats[conn.seat] is conn:
+            self.seats[conn.seat] = None
+            if self.running:
+                self.games[conn.seat].game_over = True  # forfeit
+        for group in (self.viewers, self.joining):
+            if conn in group:
+                group.remove(conn)
+
+    def _start(self):
+        for conn in self.seats:
+            conn.ready = False
+        self._new_games()
+        self.running = True
+        self.result = None
+        self.matches += 1
+
+    async def _run(self):
+        ticks = FixedStep()
+        frames = FixedStep(self.broadcast_rate, max_lag=0)
+        while True:
+            await asyncio.sleep(ticks.delay())
+            due = ticks.due()
+            if self.running:
+                self._simulate(due)
+            if frames.due():
+                self.broadcast()
+
+    def _simulate(self, due):
+        """Apply queued inputs, then run due ticks of both games, routing garbage after each."""
+        games = self.games
+        events = self.events
+        for seat, game in enumerate(games):
+            for action in self.inputs[seat]:
+                for name in game.step(action, 0.0):
+                    events[seat] |= EVENT_BITS[name]
+            self.inputs[seat] = []
+        for _ in range(due):
+            if games[0].game_over or games[1].game_over:
+                break
+            for seat, game in enumerate(games):
+                for name in game.tick():
+                    events[seat] |= EVENT_BITS[name]
+            for seat, game in enumerate(games):
+                if game.garbage_out:
+                    games[1 - seat].receive_garbage(game.garbage_out, self.rng.randrange(self.rules.width))
+                    game.garbage_out = 0
+        if games[0].game_over or games[1].game_over:
+            self.running = False
+            self.result = match_result(games)
+            self._announce = self.result
+
+    def broadcast(self):
+        """Send each game's changes since the last broadcast to every viewer,
+        then bring the connections that joined since up to date."""
+        data = bytearray()
+        for seat, game in enumerate(self.games):
+            state = wire_state(game)
+            colors = game.board.colors
+            old_state, old_colors = self.sent[seat]
+            rows = changed_rows(colors, old_colors)
+            if state != old_state or rows or self.events[seat]:
+                payload = encode_delta(seat, state, old_state, rows, self.events[seat])
+                data += frame(payload)
+                self.deltas += 1
+                self.delta_bytes += len(payload) + 2
+                self.sent[seat] = (state, colors)
+            self.events[seat] = 0
+        if self._announce is not None:
+            data += frame(bytes((RESULT, self._announce)))
+            self._announce = None
+        if data:
+            data = bytes(data)
+            for conn in self.viewers:
+                self._send(conn, data)
+        if self.joining:
+            # sent now matches the games, so joiners start from the same point.
+            full = bytearray()
+            for seat, game in enumerate(self.games):
+                full += frame(bytes((FULL, seat, self.running)) + game.snapshot().to_bytes())
+                full += frame(encode_delta(seat, self.sent[seat][0], None, (), 0))
+            full = bytes(full)
+            for conn in self.joining:
+                self._send(conn, full)
+            self.viewers += self.joining
+            self.joining = []
+
+    def _send(self, conn, data):
+        transport = conn.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_BUFFER:
+            # Too slow to keep up; the reader side sees the close and calls _leave().
+            self.dropped += 1
+            transport.abort()
+            return
+        conn.writer.write(data)
+        self.bytes_sent += len(data)
+
+
+class VersusClient:
+    """A connection to a VersusServer and local copies of both games.
+
+    receive() applies the server's messages as they arrive: games[seat] is
+    rebuilt from each FULL and patched by each DELTA, and events[seat]
+    collects EVENTS bits until the caller resets it. updated is set whenever
+    this client's own game (or, for a spectator, any game) changes.
+    """
+
+    def __init__(self):
+        self.games = [None, None]
+        self.seat = None
+        self.running = False
+        self.result = None
+        self.events = [0, 0]
+        self.fulls = [0, 0]  # FULLs received per seat
+        self.updated = asyncio.Event()
+        self.messages = 0
+        self.bytes_received = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port=PORT, role=PLAYER_ROLE):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(frame(bytes((HELLO, role))))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    @property
+    def playing(self):
+        return self.seat in (0, 1)
+
+    async def receive(self):
+        """Apply messages until the server closes the connection."""
+        try:
+            while True:
+                self.handle(await read_message(self.reader))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def handle(self, payload):
+        self.messages += 1
+        self.bytes_received += len(payload) + 2
+        kind = payload[0]
+        seat = payload[1] if len(payload) > 1 else None
+        if kind == DELTA:
+            self.events[seat] |= apply_delta(self.games[seat], payload)
+        elif kind == FULL:
+            self.games[seat] = TetrisEngine.from_snapshot(Snapshot.from_bytes(payload[3:]))
+            self.running = bool(payload[2])
+            self.fulls[seat] += 1
+            if self.running:
+                self.result = None
+        elif kind == RESULT:
+            self.running = False
+            self.result = seat
+            seat = self.seat
+        elif kind == WELCOME:
+            self.seat = seat
+        if seat == self.seat or not self.playing:
+            self.updated.set()
+
+    def _send(self, payload):
+        self.writer.write(frame(payload))
+
+    def send_input(self, action):
+        self._send(bytes((INPUT, action)))
+
+    def ready(self):
+        self._send(bytes((READY,)))
+
+
+async def bot(host, port=PORT, seed=None, rematch=False):
+    """A player seat driven by ai.AutoPlayer: one action per update of its game.
+
+    Plays until the server disconnects, or one match unless rematch.
+    """
+    from ai import AutoPlayer
+
+    client = VersusClient()
+    await client.connect(host, port)
+    receiver = asyncio.ensure_future(client.receive())
+    player = AutoPlayer(seed)
+    client.ready()
+    try:
+        while not receiver.done():
+            await client.updated.wait()
+            client.updated.clear()
+            if client.result is not None:
+                if not rematch:
+                    break
+                client.result = None
+                client.ready()
+            game = client.games[client.seat] if client.playing else None
+            if not client.running or game is None or game.game_over:
+                continue
+            action = player(game)
+            if action != NONE:
+                client.send_input(action)
+    finally:
+        client.close()
+        receiver.cancel()
+    return client
+
+
+def in_sync(a, b):
+    """True if two copies of a game agree on everything the protocol carries."""
+    return a.board.rows == b.board.rows and a.board.colors == b.board.colors and wire_state(a) == wire_state(b)
+
+
+async def local(spectators=8, seconds=60.0, seed=None, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+    """One match on localhost: a server, two bots and headless spectators in
+    this process. Returns a dict of what happened and what it cost."""
+    server = VersusServer(seed, generator, rules=rules)
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    viewers = []
+    for _ in range(spectators):
+        client = VersusClient()
+        await client.connect("127.0.0.1", port, SPECTATOR_ROLE)
+        viewers.append(client)
+    receivers = [asyncio.ensure_future(c.receive()) for c in viewers]
+    bots = [asyncio.ensure_future(bot("127.0.0.1", port, None if seed is None else seed + i)) for i in range(2)]
+    start = time.perf_counter()
+    while server.result is None and time.perf_counter() - start < seconds:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    # Freeze the games and let the last broadcast arrive before comparing.
+    server.running = False
+    await asyncio.sleep(2.0 / server.broadcast_rate)
+    server.broadcast()
+    await asyncio.sleep(0.2)
+    synced = sum(all(c.games[s] is not None and in_sync(c.games[s], server.games[s]) for s in (0, 1))
+                 for c in viewers)
+    received = sum(c.bytes_received for c in viewers)
+    for task in bots + receivers:
+        task.cancel()
+    for client in viewers:
+        client.close()
+    await asyncio.sleep(0.1)  # the server's handlers see the closes and finish
+    server.close()
+    await listener.wait_closed()
+    winner = server.result
+    if winner in (0, 1):
+        # Cross-check against the games: the winner finished, or the loser topped out.
+        loser = server.games[1 - winner]
+        winner_ok = server.games[winner].completed or (loser.game_over and not loser.completed)
+    else:
+        winner_ok = True
+    return {
+        "winner": winner,
+        "winner_ok": winner_ok,
+        "seconds": elapsed,
+        "pieces": [game.pieces_placed for game in server.games],
+        "lines": [game.lines_cleared_total for game in server.games],
+        "deltas": server.deltas,
+        "bytes_per_delta": server.delta_bytes / server.deltas if server.deltas else 0.0,
+        "spectators": spectators,
+        "spectator_bytes_per_s": received / spectators / elapsed if spectators else 0.0,
+        "sent_bytes_per_s": server.bytes_sent / elapsed,
+        "in_sync": synced,
+        "dropped": server.dropped,
+    }
+
+
+async def serve(host="", port=PORT, seed=None, generator=DEFAULT_GENERATOR, rules=DEFAULT_RULES):
+    server = VersusServer(seed, generator, rules=rules)
+    listener = await server.start(host, port)
+    print("versus server on port %d" % listener.sockets[0].getsockname()[1])
+    try:
+        await listener.serve_forever()
+    finally:
+        server.close()
+
+
+METER_W = 8  # the incoming-garbage bar left of each board
+METER_COLOR = (220, 70, 70)
+
+
+async def window(host, port=PORT, role=PLAYER_ROLE, das=DAS, arr=ARR):
+    """Both games side by side, your own on the left; players send their keys."""
+    import pygame
+    import tetris
+
+    client = VersusClient()
+    await client.connect(host, port, role)
+    receiver = asyncio.ensure_future(client.receive())
+    while None in client.games and not receiver.done():
+        await asyncio.sleep(0.01)
+    if receiver.done():
+        return
+    rules = client.games[0].rules
+    tetris.set_board(rules.width, rules.height)
+    panel_w = METER_W + tetris.SCREEN_WIDTH
+    height = tetris.SCREEN_HEIGHT
+    screen = tetris.init((2 * panel_w, height))
+    pygame.display.set_caption("Tetris versus")
+    font, small_font = tetris.get_fonts()
+    order = (client.seat, 1 - client.seat) if client.playing else (0, 1)
+    panels = []
+    for i, seat in enumerate(order):
+        x = i * panel_w
+        renderer = tetris.Renderer(screen.subsurface((x + METER_W, 0, tetris.SCREEN_WIDTH, height)))
+        panels.append((seat, renderer, pygame.Rect(x, 0, METER_W, height), (x + METER_W, 0)))
+    shown = [None, None]  # overlay lines on each board, None while playing
+    fulls = [0, 0]
+    controls = Controls(das, arr, rules=rules)
+    ready = False
+    ticks = FixedStep()
+    frames = FixedStep(tetris.FRAME_RATE, max_lag=0)
+    run = True
+
+    while run and not receiver.done():
+        await asyncio.sleep(ticks.delay())
+        ticks.due()
+        draw = frames.due()
+
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                run = False
+            elif not client.playing:
+                continue
+            elif event.type == pygame.KEYUP and event.key in tetris.KEY_ACTIONS:
+                controls.release(tetris.KEY_ACTIONS[event.key], now)
+            elif event.type == pygame.KEYDOWN:
+                if not client.running:
+                    if event.key == pygame.K_SPACE and not ready:
+                        client.ready()
+                        ready = True
+                elif event.key in tetris.KEY_ACTIONS:
+                    controls.press(tetris.KEY_ACTIONS[event.key], now)
+        if client.running:
+            ready = False
+            for action in controls.poll(now):
+                client.send_input(action)
+        else:
+            controls.clear()
+        if client.playing and client.events[client.seat]:
+            bits = client.events[client.seat]
+            for name in EVENTS:
+                if bits & EVENT_BITS[name]:
+                    tetris.play(name)
+            client.events[client.seat] = 0
+
+        if not draw:
+            continue
+        games = client.games
+        best = max(game.score for game in games)
+        dirty = []
+        flip = False
+        for seat, renderer, meter, offset in panels:
+            game = games[seat]
+            if client.fulls[seat] != fulls[seat]:
+                fulls[seat] = client.fulls[seat]
+                renderer.invalidate()
+            lines = None if client.running else _overlay(client, seat, ready, font, small_font, height)
+            if lines != shown[seat]:
+                shown[seat] = lines
+                renderer.invalidate()
+            if lines is None:
+                dirty += [r.move(offset) for r in renderer.draw(game, best)]
+            elif renderer.draw_overlay(game, best, 200, lines):
+                flip = True
+            pending = min(rules.height, sum(count for count, _ in game.incoming)) * tetris.BLOCK_SIZE
+            screen.fill(tetris.BG, meter)
+            screen.fill(METER_COLOR, (meter.x + 1, tetris.PLAY_H - pending, METER_W - 2, pending))
+            dirty.append(meter)
+        if flip:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+
+    client.close()
+    receiver.cancel()
+    pygame.quit()
+
+
+def _overlay(client, seat, ready, font, small_font, height):
+    """draw_overlay() lines for a board between matches."""
+    from tetris import TEXT, TEXT_MUTED
+
+    mid = height // 2
+    if client.result is None:
+        title = "WAITING"
+    elif client.result == DRAW:
+        title = "DRAW"
+    elif client.result == seat:
+        title = "WINNER"
+    else:
+        game = client.games[seat]
+        title = "TOPPED OUT" if game is not None and game.game_over else "BEATEN"
+    lines = [(title, font, TEXT, mid - 30)]
+    if seat == client.seat:
+        hint = "waiting for opponent" if ready else "SPACE when ready"
+        lines.append((hint, small_font, TEXT_MUTED, mid + 10))
+    return tuple(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Two-player Tetris over the network.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("serve", help="host a match")
+    p.add_argument("--host", default="", help="address to listen on (default: all)")
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--seed", type=int, help="fixes the match seeds and garbage holes")
+    p.add_argument("--generator", choices=GENERATOR_NAMES, default=DEFAULT_GENERATOR,
+                   help="piece randomizer (default %(default)s)")
+    p.add_argument("--mode", choices=RULESET_NAMES, default="marathon",
+                   help="rule set: board size, timing and scoring (default %(default)s)")
+    for name, text in (("play", "join as a player"), ("watch", "join as a spectator")):
+        p = commands.add_parser(name, help=text)
+        p.add_argument("host")
+        p.add_argument("--port", type=int, default=PORT)
+        p.add_argument("--das", type=float, default=DAS * 1000, help="ms (default %(default)g)")
+        p.add_argument("--arr", type=float, default=ARR * 1000, help="ms (default %(default)g)")
+    p = commands.add_parser("local", help="a bot match with headless spectators on localhost")
+    p.add_argument("--spectators", type=int, default=8)
+    p.add_argument("--seconds", type=float, default=60.0, help="give up on the match after this long")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--generator", choices=GENERATOR_NAMES, default=DEFAULT_GENERATOR)
+    p.add_argument("--mode", choices=RULESET_NAMES, default="marathon")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.seed, args.generator, RULESETS[args.mode]))
+        except KeyboardInterrupt:
+            pass
+    elif args.command in ("play", "watch"):
+        role = PLAYER_ROLE if args.command == "play" else SPECTATOR_ROLE
+        asyncio.run(window(args.host, args.port, role, args.das / 1000, args.arr / 1000))
+    else:
+        r = asyncio.run(local(args.spectators, args.seconds, args.seed, args.generator, RULESETS[args.mode]))
+        if r["winner"] is None:
+            outcome = "no winner after %.1f s" % r["seconds"]
+        elif r["winner"] == DRAW:
+            outcome = "draw after %.1f s" % r["seconds"]
+        else:
+            outcome = "seat %d won after %.1f s" % (r["winner"], r["seconds"])
+        print("match      : %s (pieces %d/%d, lines %d/%d)" % ((outcome,) + tuple(r["pieces"] + r["lines"])))
+        print("deltas     : %d, %.1f bytes each" % (r["deltas"], r["bytes_per_delta"]))
+        print("spectators : %d, %.0f bytes/s each; server sent %.0f bytes/s in all"
+              % (r["spectators"], r["spectator_bytes_per_s"], r["sent_bytes_per_s"]))
+        print("in sync    : %d/%d spectators (%d dropped)" % (r["in_sync"], r["spectators"], r["dropped"]))
+        if not r["winner_ok"]:
+            raise SystemExit("winner does not match the games: seat %d neither finished nor outlasted" % r["winner"])
+
+
+if __name__ == "__main__":
+    main()